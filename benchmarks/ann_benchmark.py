@@ -0,0 +1,97 @@
+"""
+Бенчмарк бекендів пошуку облич: точний NumPy-скан проти IVF.
+
+Генерує синтетичну галерею (випадкові одиничні вектори 512-d як "прототипи" людей),
+запити — ті самі вектори з шумом, як нове фото тієї ж людини.
+Для кожного розміру галереї друкує recall@1 відносно точного пошуку та затримку запиту.
+
+Запуск:
+    python -m benchmarks.ann_benchmark --sizes 1000 10000 50000 --nprobe 4 8 16
+"""
+import argparse
+import json
+import time
+import numpy as np
+from face.index import ExactIndex, IVFIndex
+from face.recognizer import l2_normalize
+
+
+def make_gallery(size, dim, rng):
+    return l2_normalize(rng.normal(size=(size, dim)))
+
+
+def make_queries(gallery, count, noise, rng):
+    idx = rng.integers(0, len(gallery), size=count)
+    queries = gallery[idx] + noise * l2_normalize(rng.normal(size=(count, gallery.shape[1])))
+    return l2_normalize(queries)
+
+
+def build(index, gallery):
+    start = time.perf_counter()
+    for row, vector in enumerate(gallery):
+        index.upsert(row, vector)
+    return time.perf_counter() - start
+
+
+def measure(index, queries):
+    latencies = []
+    rows = []
+    for query in queries:
+        start = time.perf_counter()
+        _, top = index.search(query[None, :], k=1)
+        latencies.append(time.perf_counter() - start)
+        rows.append(top[0, 0] if top.shape[1] else -1)
+    latencies = np.array(latencies) * 1000
+    return np.array(rows), {
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+    }
+
+
+def run(sizes, nprobes, dim, queries_count, noise, seed):
+    rng = np.random.default_rng(seed)
+    report = []
+    for size in sizes:
+        gallery = make_gallery(size, dim, rng)
+        queries = make_queries(gallery, queries_count, noise, rng)
+
+        exact = ExactIndex(dim=dim)
+        build(exact, gallery)
+        truth, exact_latency = measure(exact, queries)
+        report.append({"size": size, "backend": "exact", "recall@1": 1.0, **exact_latency})
+
+        for nprobe in nprobes:
+            ivf = IVFIndex(dim=dim, nprobe=nprobe, train_min=min(size, 2000))
+            build_sec = build(ivf, gallery)
+            found, latency = measure(ivf, queries)
+            recall = float(np.mean(found == truth))
+            report.append({
+                "size": size, "backend": f"ivf(nlist={len(ivf.centroids)}, nprobe={nprobe})",
+                "recall@1": round(recall, 4), **latency, "build_sec": round(build_sec, 2),
+            })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@1 та затримка ANN-індексу проти точного пошуку")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.6, help="відносна величина шуму запиту")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="вивести результат у JSON")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.nprobe, args.dim, args.queries, args.noise, args.seed)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'size':>8} {'backend':<28} {'recall@1':>9} {'mean ms':>9} {'p95 ms':>9}")
+    for row in report:
+        print(f"{row['size']:>8} {row['backend']:<28} {row['recall@1']:>9} {row['mean_ms']:>9} {row['p95_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Відтворює записані кліпи через повний пайплайн (обличчя + жести + події) без вікна
+і звітує таймінги стадій, перцентилі затримки кадру та пропускну здатність у JSON.
+
+Стадії: decode, face (детекція), embed (вирівнювання + ArcFace), recognize, track, hands (MediaPipe),
+gesture (класифікація), events, render.
+
+Запуск:
+    python -m benchmarks.replay_benchmark clips/lobby.mp4 clips/frames_dir --output bench.json
+"""
+import argparse
+import json
+import time
+import numpy as np
+import core.controller as controller
+from core.processor import FrameProcessor
+from core.sources import open_source
+from core.timing import begin_frame, end_frame, stage
+from data.data import USERS_DATA
+from face.embedder import FaceEmbedder
+from face.enrollment import load_users_from_dict
+from face.recognizer import FaceRecognizer
+from face.store import EmbeddingStore
+from face.tracker import FaceTracker
+from gestures.predictor import GesturePredictor
+from utils.overlay import Compositor
+
+STAGES = ("decode", "face", "embed", "recognize", "track", "hands", "gesture", "events", "render")
+
+
+def percentiles_ms(values):
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    arr = np.asarray(values) * 1000
+    return {
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "p99": round(float(np.percentile(arr, 99)), 3),
+    }
+
+
+def replay(source, processor, max_frames=None, warmup=5):
+    """
+    Проганяє одне джерело. Перші warmup кадрів не входять у статистику
+    """
+    cap = open_source(source)
+    stage_samples = {name: [] for name in STAGES}
+    frame_latencies = []
+    counts = {"faces": 0, "hands": 0, "gestures": 0}
+    frames = 0
+    wall_start = None
+
+    try:
+        while max_frames is None or frames < max_frames + warmup:
+            timings = begin_frame()
+            start = time.perf_counter()
+            with stage("decode"):
+                ret, frame = cap.read()
+            if not ret:
+                end_frame()
+                break
+
+            _, faces, gestures = processor.process(frame)
+            latency = time.perf_counter() - start
+            end_frame()
+            frames += 1
+
+            if frames == warmup + 1:
+                wall_start = start
+            if frames <= warmup:
+                continue
+
+            frame_latencies.append(latency)
+            for name in STAGES:
+                stage_samples[name].append(timings.stages.get(name, 0.0))
+            counts["faces"] += len(faces)
+            counts["hands"] += len(gestures)
+            counts["gestures"] += sum(1 for g in gestures if g["gesture"])
+    finally:
+        cap.release()
+    # Реакції на події йдуть у потоці диспетчера: дочікуємось черги, щоб вони не перетікали в наступний кліп
+    bus = controller.get_event_bus()
+    bus.wait_idle(timeout=5.0)
+
+    measured = len(frame_latencies)
+    wall = time.perf_counter() - wall_start if wall_start is not None else 0.0
+    return {
+        "source": str(source),
+        "frames": measured,
+        "throughput_fps": round(measured / wall, 2) if wall > 0 else 0.0,
+        "frame_latency_ms": percentiles_ms(frame_latencies),
+        "stages_ms": {name: percentiles_ms(samples) for name, samples in stage_samples.items()},
+        "counts": counts,
+        "events_dropped": bus.dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пайплайну на записаних кліпах")
+    parser.add_argument("sources", nargs="+", help="відеофайли, URL або папки з кадрами")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--keyframe-interval", type=int, default=10)
+    parser.add_argument("--render", action="store_true", help="включити малювання overlay у заміри")
+    parser.add_argument("--roi-hands", action="store_true", help="руки лише навколо облич знайомих користувачів")
+    parser.add_argument("--output", help="зберегти JSON у файл замість stdout")
+    args = parser.parse_args()
+
+    # Події обробляються повністю, але без браузера та озвучки
+    controller.SIDE_EFFECTS_ENABLED = False
+
+    embedder = FaceEmbedder(device="cpu")
+    recognizer = FaceRecognizer(threshold=0.4)
+    store = EmbeddingStore(model_name=embedder.model_name)
+    load_users_from_dict(data=USERS_DATA, embedder=embedder, recognizer=recognizer, store=store)
+
+    report = {"keyframe_interval": args.keyframe_interval, "render": args.render, "roi_hands": args.roi_hands,
+              "runs": []}
+    for source in args.sources:
+        # Свіжий стан трекера та історії жестів для кожного кліпу, моделі облич — спільні
+        processor = FrameProcessor(
+            FaceTracker(embedder, recognizer, keyframe_interval=args.keyframe_interval),
+            GesturePredictor(),
+            Compositor(enabled=args.render),
+            roi_hands=args.roi_hands,
+        )
+        report["runs"].append(replay(source, processor, args.max_frames, args.warmup))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
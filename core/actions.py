@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+from collections import namedtuple
+from utils.database import DB_PATH, db_lock, get_connection, table_version, watch_tables
+
+# Типи дій:
+#   reaction — лише повідомлення на екрані та/або фраза
+#   open_url — відкрити payload["url"] у браузері
+#   open_app — відкрити програму payload["app"] (як голосова команда)
+# Будь-яка дія може мати в payload "message", "color", "duration" та "say"; {user} підставляється
+ACTION_TYPES = ("reaction", "open_url", "open_app")
+# Cooldown дії (с) для пари (користувач, жест), якщо в рядку таблиці він не заданий.
+# Як і до таблиці gesture_actions, реакції повторюються не частіше за загальний cooldown жестів (COOLDOWN_SEC)
+DEFAULT_COOLDOWN = 2.0
+# Таблиця перекомпілюється лише після змін у цих таблицях
+ACTION_TABLES = ("gesture_actions", "user_roles")
+
+GestureAction = namedtuple("GestureAction", ["id", "gesture", "user_id", "role", "action_type", "payload", "cooldown"])
+
+# Те, що раніше було if-гілками в handle_event; записується в порожню таблицю при першому запуску
+# (жест, user_id, роль, тип, payload, cooldown)
+DEFAULT_ACTIONS = [
+    ("wave", None, None, "open_url", {"url": "https://www.youtube.com", "message": "Відкриваю YouTube...",
+                                      "color": [0, 255, 255], "duration": 2.0, "say": "Відкриваю ютуб"},
+     DEFAULT_COOLDOWN),
+    ("thumbs_up", None, None, "reaction", {"message": "Круто!", "color": [0, 255, 0], "duration": 1.5,
+                                           "say": "Це просто круто"}, DEFAULT_COOLDOWN),
+    ("victory", None, None, "reaction", {"message": "Перемога!", "color": [255, 0, 255], "duration": 2.0,
+                                         "say": "Все буде Україна"}, DEFAULT_COOLDOWN),
+]
+
+
+class ActionTable:
+    """
+    Прив'язки жест -> дія з таблиці gesture_actions бази assistant.db.
+
+    Рядок діє для конкретного користувача (user_id), для ролі (role, див. таблицю user_roles)
+    або для всіх (обидва NULL). При старті рядки компілюються у dict із ключем (жест, область),
+    тож lookup — щонайбільше три звернення до dict: користувач, його роль, усі.
+    Зміни в gesture_actions / user_roles підхоплюються без перезапуску
+    (перевірка не частіше ніж раз на check_interval).
+    """
+
+    def __init__(self, db_path=DB_PATH, default_cooldown=DEFAULT_COOLDOWN, check_interval=1.0):
+        self.db_path = db_path
+        self.default_cooldown = default_cooldown
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._table = {}
+        self._roles = {}
+        self._version = None
+        self._checked_at = 0.0
+
+        with db_lock:
+            conn = get_connection(db_path)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS gesture_actions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    gesture TEXT NOT NULL,
+                    user_id TEXT,
+                    role TEXT,
+                    action_type TEXT NOT NULL,
+                    payload TEXT NOT NULL DEFAULT '{}',
+                    cooldown REAL,
+                    enabled INTEGER NOT NULL DEFAULT 1
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS user_roles (
+                    user_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    PRIMARY KEY (user_id, role)
+                )
+            ''')
+            if conn.execute("SELECT COUNT(*) FROM gesture_actions").fetchone()[0] == 0:
+                conn.executemany(
+                    "INSERT INTO gesture_actions (gesture, user_id, role, action_type, payload, cooldown) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(g, u, r, t, json.dumps(p, ensure_ascii=False), c) for g, u, r, t, p, c in DEFAULT_ACTIONS]
+                )
+            conn.commit()
+        watch_tables(ACTION_TABLES, db_path)
+        self.reload()
+
+    def reload(self):
+        with db_lock:
+            conn = get_connection(self.db_path)
+            rows = conn.execute(
+                "SELECT id, gesture, user_id, role, action_type, payload, cooldown FROM gesture_actions "
+                "WHERE enabled = 1 ORDER BY id"
+            ).fetchall()
+            role_rows = conn.execute("SELECT user_id, role FROM user_roles ORDER BY role").fetchall()
+        version = table_version(ACTION_TABLES, self.db_path)
+
+        table = {}
+        for row_id, gesture, user_id, role, action_type, payload, cooldown in rows:
+            if action_type not in ACTION_TYPES:
+                print(f"[WARN] gesture_actions #{row_id}: невідомий тип дії '{action_type}'")
+                continue
+            try:
+                payload = json.loads(payload or "{}")
+            except ValueError as e:
+                print(f"[WARN] gesture_actions #{row_id}: некоректний payload ({e})")
+                continue
+            # Область: ("user", id) / ("role", назва) / ("all", None); при дублікатах діє перший рядок
+            scope = ("user", user_id) if user_id else ("role", role) if role else ("all", None)
+            table.setdefault((gesture, scope), GestureAction(
+                row_id, gesture, user_id, role, action_type, payload,
+                self.default_cooldown if cooldown is None else cooldown
+            ))
+
+        roles = {}
+        for user_id, role in role_rows:
+            roles.setdefault(user_id, []).append(role)
+
+        with self._lock:
+            self._table, self._roles, self._version = table, roles, version
+            self._checked_at = time.monotonic()
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if table_version(ACTION_TABLES, self.db_path) != self._version:
+            self.reload()
+
+    def lookup(self, gesture, user_id):
+        """
+        Дія для жесту користувача або None. Пріоритет: користувач, його ролі, усі
+        """
+        self._maybe_reload()
+        table, roles = self._table, self._roles
+        action = table.get((gesture, ("user", user_id)))
+        if action is not None:
+            return action
+        for role in roles.get(user_id, ()):
+            action = table.get((gesture, ("role", role)))
+            if action is not None:
+                return action
+        return table.get((gesture, ("all", None)))
+
+    def phrases(self, user_ids=()):
+        """
+        Усі фрази "say" з таблиці (з підставленими іменами) — для попереднього синтезу
+        """
+        texts = []
+        for action in self._table.values():
+            say = action.payload.get("say")
+            if not say:
+                continue
+            if "{user}" in say:
+                targets = [action.user_id] if action.user_id else user_ids
+                texts += [say.replace("{user}", str(user_id)) for user_id in targets]
+            else:
+                texts.append(say)
+        return texts
+
+
+_actions = None
+_actions_lock = threading.Lock()
+
+
+def get_action_table(db_path=DB_PATH):
+    global _actions
+    with _actions_lock:
+        if _actions is None or _actions.db_path != db_path:
+            _actions = ActionTable(db_path)
+        return _actions
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Де може бути рука користувача відносно його обличчя: центр руки в межах рамки обличчя,
+# розширеної на HAND_PADDING_X в боки і на HAND_PADDING_Y донизу
+HAND_PADDING_X = 200
+HAND_PADDING_Y = 300
+
+# Вартість недопустимої пари (рука поза зоною обличчя); такі призначення відкидаються
+INFEASIBLE = 1e6
+# Штраф, якщо рука з боку, протилежного її handedness
+SIDE_PENALTY = 1.0
+
+
+def hand_centers(gestures):
+    """
+    Центри рамок рук: (hands, 2) float32
+    """
+    if not gestures:
+        return np.zeros((0, 2), dtype=np.float32)
+    boxes = np.array([g["bbox"] for g in gestures], dtype=np.float32)
+    return (boxes[:, :2] + boxes[:, 2:]) / 2
+
+
+def association_costs(centers, face_boxes, handedness):
+    """
+    Матриця вартостей (hands, 2 * faces): кожне обличчя має два "слоти" — ліву і праву руку.
+
+    Очікувана позиція руки — збоку від обличчя на рівні грудей; вартість — відстань до неї
+    в розмірах обличчя плюс штраф за невідповідність handedness. Пари поза зоною руки
+    (HAND_PADDING_X / HAND_PADDING_Y) мають вартість INFEASIBLE.
+
+    handedness: список "Left"/"Right"/None у термінах кадру ("Right" — рука праворуч на зображенні).
+    """
+    faces = np.asarray(face_boxes, dtype=np.float32).reshape(-1, 4)
+    fx1, fy1, fx2, fy2 = faces.T
+    face_w = np.maximum(fx2 - fx1, 1.0)
+    face_h = np.maximum(fy2 - fy1, 1.0)
+    face_cx = (fx1 + fx2) / 2
+
+    hx = centers[:, 0:1]  # (hands, 1)
+    hy = centers[:, 1:2]
+    inside = (hx >= fx1 - HAND_PADDING_X) & (hx <= fx2 + HAND_PADDING_X) & \
+             (hy >= fy1) & (hy <= fy2 + HAND_PADDING_Y)
+
+    # Слот 0 — рука ліворуч від обличчя на зображенні, слот 1 — праворуч
+    dy = (hy - (fy2 + face_h / 2)) / face_h
+    costs = np.empty((len(centers), len(faces), 2), dtype=np.float32)
+    for slot, sign in enumerate((-1.0, 1.0)):
+        dx = (hx - (face_cx + sign * face_w)) / face_w
+        costs[:, :, slot] = np.sqrt(dx * dx + dy * dy)
+
+    side = np.array([{"Left": 0, "Right": 1}.get(h, -1) for h in handedness])
+    known = side >= 0
+    costs[known, :, 1 - side[known]] += SIDE_PENALTY
+
+    costs[~inside] = INFEASIBLE
+    return costs.reshape(len(centers), -1)
+
+
+def linear_assignment(costs):
+    """
+    Угорський алгоритм (з потенціалами) для прямокутної матриці.
+    Повертає масив (rows,) з індексом стовпця для кожного рядка або -1.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    transposed = costs.shape[0] > costs.shape[1]
+    if transposed:
+        costs = costs.T
+    n, m = costs.shape
+    if n == 0:
+        return np.full(costs.shape[1] if transposed else 0, -1, dtype=int)
+
+    # Класична реалізація для n <= m, індексація з 1; стовпець 0 — фіктивний
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)  # owner[j] — рядок, призначений стовпцю j
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            cur = costs[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    row_to_col = np.full(n, -1, dtype=int)
+    for j in range(1, m + 1):
+        if owner[j]:
+            row_to_col[owner[j] - 1] = j - 1
+    if not transposed:
+        return row_to_col
+    col_to_row = np.full(m, -1, dtype=int)
+    col_to_row[row_to_col[row_to_col >= 0]] = np.nonzero(row_to_col >= 0)[0]
+    return col_to_row
+
+
+def associate_hands(gestures, users):
+    """
+    Один власник на руку: для кожної руки індекс обличчя в users або None.
+    Кожне обличчя може мати щонайбільше дві руки (ліву і праву); в розрахунок ідуть усі обличчя,
+    включно з невідомими, щоб рука перехожого не діставалась сусідньому користувачу.
+    """
+    owners = [None] * len(gestures)
+    if not gestures or not users:
+        return owners
+
+    costs = association_costs(hand_centers(gestures), [u["bbox"] for u in users],
+                              [g.get("handedness") for g in gestures])
+    for hand, col in enumerate(linear_assignment(costs)):
+        if col >= 0 and costs[hand, col] < INFEASIBLE:
+            owners[hand] = int(col) // 2
+    return owners
@@ -0,0 +1,169 @@
+import threading
+from collections import deque
+from utils.database import DB_PATH, db_lock, get_connection, table_version, watch_tables
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасік: усі входження всіх ключових фраз за один прохід по тексту,
+    незалежно від кількості фраз.
+    """
+
+    def __init__(self):
+        self._goto = [{}]     # стан -> {символ: стан}
+        self._fail = [0]
+        self._output = [[]]   # стан -> [(довжина фрази, значення), ...]
+
+    def add(self, pattern, value):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append((len(pattern), value))
+
+    def build(self):
+        """
+        Суфіксні посилання (BFS); викликати після всіх add
+        """
+        queue = deque(self._goto[0].values())  # у станів першого рівня суфіксне посилання — корінь
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find_all(self, text):
+        """
+        Повертає [(start, end, value), ...] для всіх входжень
+        """
+        found = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, value in self._output[state]:
+                found.append((i + 1 - length, i + 1, value))
+        return found
+
+
+class CommandMatch:
+    def __init__(self, kind, keyword, row_id, payload, start):
+        self.kind = kind          # "command" або "app"
+        self.keyword = keyword
+        self.row_id = row_id
+        self.payload = payload    # command: {"response"}; app: {"app_name", "path"}
+        self.start = start
+
+    def __repr__(self):
+        return f"CommandMatch({self.kind!r}, {self.keyword!r})"
+
+
+# При однаковій довжині фрази команда має пріоритет над додатком (як і раніше: спершу commands, потім apps)
+_KIND_PRIORITY = {"command": 0, "app": 1}
+
+# Автомат перебудовується лише після змін у цих таблицях
+COMMAND_TABLES = ("commands", "apps")
+
+
+class CommandMatcher:
+    """
+    Ключові фрази з таблиць commands і apps, завантажені в пам'ять один раз.
+
+    match(text) знаходить усі фрази за один прохід і вибирає детерміновано: найдовша фраза,
+    далі команда перед додатком, далі раніше входження в тексті, далі менший id рядка.
+    Якщо таблиці commands / apps змінились (лічильники table_versions, див. watch_tables),
+    автомат перебудовується перед наступним пошуком; записи в інші таблиці бази його не скидають.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._automaton = None
+        self._version = None
+        self._keywords = []
+        self._contained = set()  # фрази, що є частиною довшої фрази
+        watch_tables(COMMAND_TABLES, db_path)
+
+    def _load(self):
+        automaton = AhoCorasick()
+        with db_lock:
+            conn = get_connection(self.db_path)
+            commands = conn.execute("SELECT id, keyword, response FROM commands").fetchall()
+            apps = conn.execute("SELECT id, keyword, app_name, path FROM apps").fetchall()
+
+        for row_id, keyword, response in commands:
+            if keyword:
+                automaton.add(keyword.lower(), ("command", keyword, row_id, {"response": response}))
+        for row_id, keyword, app_name, path in apps:
+            if keyword:
+                automaton.add(keyword.lower(), ("app", keyword, row_id, {"app_name": app_name, "path": path}))
+        automaton.build()
+
+        keywords = sorted({kw.lower() for _, kw, *_ in commands + apps if kw})
+        # Той самий автомат, пущений по самих фразах, знаходить фрази, вкладені в довші
+        contained = {
+            value[1].lower()
+            for keyword in keywords
+            for start, end, value in automaton.find_all(keyword)
+            if end - start < len(keyword)
+        }
+        return automaton, keywords, contained
+
+    def _ensure_loaded(self):
+        version = table_version(COMMAND_TABLES, self.db_path)
+        with self._lock:
+            if self._automaton is None or version != self._version:
+                self._automaton, self._keywords, self._contained = self._load()
+                self._version = version
+            return self._automaton
+
+    def find_all(self, text):
+        automaton = self._ensure_loaded()
+        return [
+            CommandMatch(kind, keyword, row_id, payload, start)
+            for start, _, (kind, keyword, row_id, payload) in automaton.find_all(text.lower())
+        ]
+
+    def match(self, text, unambiguous=False):
+        """
+        Найкращий збіг або None.
+        unambiguous — для проміжних гіпотез розпізнавання: фраза, що є частиною довшої
+        (наприклад, "телеграм" і "телеграм веб"), ще може змінитись, тож такий збіг не повертається
+        """
+        matches = self.find_all(text)
+        if not matches:
+            return None
+        best = min(matches, key=lambda m: (-len(m.keyword), _KIND_PRIORITY[m.kind], m.start, m.row_id))
+        if unambiguous and best.keyword.lower() in self._contained:
+            return None
+        return best
+
+    def keywords(self):
+        """
+        Усі ключові фрази (нижній регістр) — граматика для офлайн-розпізнавання
+        """
+        self._ensure_loaded()
+        return list(self._keywords)
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_command_matcher(db_path=DB_PATH):
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None or _matcher.db_path != db_path:
+            _matcher = CommandMatcher(db_path)
+        return _matcher
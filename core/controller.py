@@ -1,227 +1,307 @@
-import asyncio
 import platform
-import sqlite3
-import cv2
 import time
 import webbrowser
 import os
 import threading
-import edge_tts
-import numpy as np
 import pygame
-from PIL import ImageFont, ImageDraw, Image
 import speech_recognition as sr
 import subprocess
-from utils.finder import find_app_path
-from utils.voice_engine import speak_async, speak_task
+from core.actions import get_action_table
+from core.commands import get_command_matcher
+from core.speech import SAMPLE_RATE, SpeechHandler, create_backend
+from core.events import EMPTY_MESSAGE, EventBus, GestureEvent, MessageSnapshot, RateLimiter
+from core.metrics import metrics
+from utils.database import db_lock, get_connection
+from utils.finder import app_index_ready, find_app_path
+from utils.voice_engine import PRIORITY_HIGH, PRIORITY_LOW, prewarm, speak_async, speak_task
 
-# Ініціалізація pygame mixer
-pygame.mixer.init()
+# Ініціалізація pygame mixer (на сервері без звукової карти просто працюємо без звуку)
+try:
+    pygame.mixer.init()
+except pygame.error as e:
+    print(f"🔊 Звук недоступний: {e}")
 
-# Контейнер для стану (спільна пам'ять між потоками)
+# Контейнер для стану (спільна пам'ять між потоками: диспетчер подій пише, голосовий потік читає)
 class AssistantState:
     def __init__(self):
         self.user_id = None        # Останній впізнаний (для авто-вітання)
         self.active_user = None    # Той, хто звернувся через жест
         self.last_active_time = 0
+        self._lock = threading.Lock()
+
+    def set_user(self, user_id):
+        with self._lock:
+            self.user_id = user_id
+
+    def activate(self, user_id, timestamp):
+        with self._lock:
+            self.active_user = user_id
+            self.last_active_time = timestamp
+
+    def focus(self, user_id=None):
+        """
+        Хто зараз керує асистентом: той, хто звернувся жестом, інакше user_id
+        """
+        with self._lock:
+            return self.active_user if self.active_user else user_id
+
+    def current_user(self):
+        with self._lock:
+            return self.user_id
 
 state = AssistantState()
 
 # Таймери та змінні
-last_event_time = {"greet": 0, "gesture": 0, "action": 0}
-last_user_id = None
-current_message = ""
 COOLDOWN_SEC = 2
-ACTION_COOLDOWN = 5
-current_message_color = (0, 255, 0)
-greeted_users = set()
-message_expiry_time = 0
-spoken_gestures = {"thumbs_up": False, "stop": False}
 
-recognizer = sr.Recognizer()
-mic = sr.Microphone()
+# Стан подій окремої камери: у кожного входу свої вітання, cooldown і повідомлення на екрані.
+# Змінюється лише потоком диспетчера подій; UI читає тільки незмінний знімок message
+class EventState:
+    def __init__(self):
+        self.last_user_id = None
+        self.greeted_users = set()
+        self.message = EMPTY_MESSAGE
 
-def voice_callback(rec, audio):
-    """Callback функція: викликається автоматично при виявленні голосу"""
-    try:
-        # 1. Розпізнаємо текст
-        command = rec.recognize_google(audio, language='uk-UA').lower()
-        
-        # 2. Викликаємо обробник, ПЕРЕДАЮЧИ актуальний user_id зі стану
-        process_voice_command(command, state.user_id)
-    except sr.UnknownValueError:
-        print("Не розпізнано слів")
-    except Exception as e:
-        print(f"🎙 Помилка розпізнавання: {e}")
+    def show(self, text, color, duration, now):
+        self.message = MessageSnapshot(text, color, now + duration)  # заміна посилання атомарна
+
+    def message_expiry_time(self):
+        return self.message.expires_at
+
+event_states = {}
+_event_states_lock = threading.Lock()
+
+def get_event_state(stream_id=0):
+    with _event_states_lock:
+        if stream_id not in event_states:
+            event_states[stream_id] = EventState()
+        return event_states[stream_id]
+# False — події обробляються (повідомлення, cooldown), але без браузера й озвучки (бенчмарки, сервер)
+SIDE_EFFECTS_ENABLED = True
+
+# Рушій розпізнавання мовлення (core.speech): "google" — мережа, "vosk" — офлайн із проміжними гіпотезами
+SPEECH_BACKEND = "google"
+VOSK_MODEL_PATH = "models/vosk-uk"
+EXIT_KEYWORD = "вихід"
+
+speech_backend = None
+mic = None  # створюється у start_voice_assistant, щоб імпорт не вимагав мікрофона
+stop_listening = None  # функція зупинки фонового прослуховування (повертає speech_backend.start)
 
-def start_voice_assistant():
+class VoiceCommandHandler(SpeechHandler):
+    """Отримує текст від рушія розпізнавання і передає його в process_voice_command"""
+
+    def on_partial(self, text):
+        # Команда спрацьовує, щойно в гіпотезі з'явилась ключова фраза, яку вже не може "перекрити" довша
+        if EXIT_KEYWORD in text or get_command_matcher().match(text, unambiguous=True):
+            process_voice_command(text, state.current_user())
+            return True
+        return False
+
+    def on_final(self, text):
+        # Викликаємо обробник, ПЕРЕДАЮЧИ актуальний user_id зі стану
+        process_voice_command(text, state.current_user())
+
+def start_voice_assistant(backend=SPEECH_BACKEND, model_path=VOSK_MODEL_PATH):
     """Запуск прослуховування"""
+    global mic, speech_backend, stop_listening
     try:
-        with mic as source:
-            recognizer.adjust_for_ambient_noise(source, duration=1)
-        # Важливо: передаємо посилання на функцію voice_callback
-        recognizer.listen_in_background(mic, voice_callback)
+        # Офлайн-рушій шукає лише ключові фрази з бази
+        grammar = get_command_matcher().keywords() + [EXIT_KEYWORD] if backend == "vosk" else None
+        speech_backend = create_backend(backend, model_path, grammar)
+        mic = sr.Microphone(sample_rate=SAMPLE_RATE) if speech_backend.streaming else sr.Microphone()
+        stop_listening = speech_backend.start(mic, VoiceCommandHandler())
         print("👂 Голосовий асистент запущено...")
     except Exception as e:
         print(f"❌ Не вдалося запустити мікрофон: {e}")
 
+def stop_voice_assistant():
+    """Зупинка прослуховування (при виході)"""
+    global stop_listening
+    if stop_listening is not None:
+        stop_listening(wait_for_stop=False)
+        stop_listening = None
+
+# Незмінні фрази озвучки: їх аудіо готується заздалегідь (prewarm_voice)
+AUTH_REQUIRED_TEXT = "Будь ласка, авторизуйтесь жестом для доступу."
+GOODBYE_TEXT = "Бувайте!"
+
+def greeting_text(user_id):
+    return f"Привіт, {user_id}. Рада тебе бачити"
+
+def prewarm_voice(user_ids):
+    """
+    Синтезує у фоні всі відомі фрази: реакції на жести (gesture_actions), вітання знайомих користувачів
+    та відповіді з таблиць commands / apps (з підставленими іменами), щоб вони звучали без затримки
+    """
+    if not SIDE_EFFECTS_ENABLED:
+        return
+    user_ids = list(user_ids)
+    texts = get_action_table().phrases(user_ids) + [AUTH_REQUIRED_TEXT, GOODBYE_TEXT]
+    texts += [greeting_text(user_id) for user_id in user_ids]
+    try:
+        with db_lock:
+            conn = get_connection()
+            responses = [row[0] for row in conn.execute("SELECT response FROM commands")]
+            app_names = [row[0] for row in conn.execute("SELECT app_name FROM apps")]
+    except Exception as e:
+        print(f"🔊 Фрази з бази не завантажено: {e}")
+        responses, app_names = [], []
+    for response in responses:
+        if "{user}" in response:
+            texts += [response.replace("{user}", str(user_id)) for user_id in user_ids]
+        else:
+            texts.append(response)
+    texts += [f"Відкриваю {app_name}" for app_name in app_names]
+    prewarm(texts)
+
+def open_app(app_name, saved_path=None):
+    """
+    Запуск програми з таблиці apps (голосова команда або дія жесту open_app)
+    """
+    # Логіка для Mac
+    if platform.system() == "Darwin":
+        clean_name = app_name.replace(".exe", "")
+        subprocess.Popen(['/usr/bin/open', '-a', clean_name])
+        return
+
+    # Логіка для Windows
+    if saved_path is None:
+        with db_lock:
+            row = get_connection().execute("SELECT path FROM apps WHERE app_name = ?", (app_name,)).fetchone()
+        saved_path = row[0] if row else None
+    path = saved_path if saved_path and os.path.exists(saved_path) else find_app_path(app_name)
+    if path:
+        os.startfile(path)
+        # Оновлюємо шлях у БД, щоб наступного разу не шукати довго
+        if path != saved_path:
+            with db_lock:
+                conn = get_connection()
+                conn.execute("UPDATE apps SET path = ? WHERE app_name = ?", (path, app_name))
+                conn.commit()
+    elif not app_index_ready():
+        speak_async("Я ще шукаю програми на диску, спробуйте за хвилину", PRIORITY_HIGH)
+    else:
+        speak_async(f"Я не знайшла {app_name} на диску", PRIORITY_HIGH)
+
 def process_voice_command(command, user_id):
     print(f"⚙️ Виконую команду '{command}'", flush=True)
-    current_focus = state.active_user if state.active_user else user_id
-    
-    conn = sqlite3.connect('assistant.db')
-    cursor = conn.cursor()
-
-    # 1. Перевірка простих команд із бази
-    cursor.execute("SELECT response FROM commands WHERE ? LIKE '%' || keyword || '%'", (command,))
-    cmd_row = cursor.fetchone()
-    if cmd_row:
-        response = cmd_row[0].replace("{user}", str(current_focus))
-        speak_async(response)
-        conn.close()
+    current_focus = state.focus(user_id)
+
+    # Усі ключові фрази з commands і apps шукаються за один прохід (core.commands),
+    # найдовша фраза має пріоритет, при рівній довжині — команда перед додатком
+    match = get_command_matcher().match(command)
+
+    # 1. Прості команди з бази
+    if match and match.kind == "command":
+        response = match.payload["response"].replace("{user}", str(current_focus))
+        speak_async(response, PRIORITY_HIGH)
         return
 
-    # 2. Перевірка додатків із бази
-    cursor.execute("SELECT app_name, path FROM apps WHERE ? LIKE '%' || keyword || '%'", (command,))
-    app_row = cursor.fetchone()
-    
-    if app_row:
-        app_name, saved_path = app_row
+    # 2. Додатки з бази
+    if match and match.kind == "app":
+        app_name, saved_path = match.payload["app_name"], match.payload["path"]
         if not current_focus:
-            speak_async("Будь ласка, авторизуйтесь жестом для доступу.")
-            conn.close()
+            speak_async(AUTH_REQUIRED_TEXT, PRIORITY_HIGH)
             return
 
-        speak_async(f"Відкриваю {app_name}")
-        
-        # Логіка для Mac
-        if platform.system() == "Darwin":
-            clean_name = app_name.replace(".exe", "")
-            subprocess.Popen(['/usr/bin/open', '-a', clean_name])
-        
-        # Логіка для Windows
-        else:
-            path = saved_path if saved_path and os.path.exists(saved_path) else find_app_path(app_name)
-            if path:
-                os.startfile(path)
-                # Оновлюємо шлях у БД, щоб наступного разу не шукати довго
-                cursor.execute("UPDATE apps SET path = ? WHERE app_name = ?", (path, app_name))
-                conn.commit()
-            else:
-                speak_async(f"Я не знайшла {app_name} на диску")
+        speak_async(f"Відкриваю {app_name}", PRIORITY_HIGH)
+        open_app(app_name, saved_path)
+        return
 
     # 3. Спеціальна команда виходу
-    elif "вихід" in command:
-        conn.close()
-        speak_task("Бувайте!")
+    if EXIT_KEYWORD in command:
+        speak_task(GOODBYE_TEXT)
+        stop_voice_assistant()
         os._exit(0)
 
-    conn.close()
+# --- ПОДІЇ ---
+def _speak(text, priority=None):
+    if SIDE_EFFECTS_ENABLED:
+        if priority is None:
+            speak_async(text)
+        else:
+            speak_async(text, priority)
 
-# --- ВІЗУАЛІЗАЦІЯ ТА ПОДІЇ ---
-def draw_ukr_text(img, text, position, font_size=35, color=(0, 255, 0)):
-    h, w = img.shape[:2]
-    current_os = platform.system() # 'Windows', 'Darwin' (Mac) або 'Linux'
+def _open_url(url):
+    if SIDE_EFFECTS_ENABLED:
+        # Браузер може відкриватись секундами, тож не в потоці диспетчера
+        get_event_bus().run_blocking(webbrowser.open, url)
 
-    # 1. Адаптивне масштабування
-    if current_os == "Darwin":
-        # На Mac Retina щільність пікселів вища, тому множимо сильніше
-        retina_scale = w / 640 
-        final_font_size = int(font_size * retina_scale * 1.2)
-    else:
-        # На Windows зазвичай достатньо стандартного масштабування
-        scale = w / 1280
-        final_font_size = int(font_size * (scale if scale > 1 else 1))
-
-    img_pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-    draw = ImageDraw.Draw(img_pil)
-    
-    # 2. Вибір шляху до шрифту залежно від ОС
-    if current_os == "Windows":
-        font_path = "C:/Windows/Fonts/arial.ttf"
-    elif current_os == "Darwin":
-        font_path = "/System/Library/Fonts/Supplemental/Arial.ttf"
-    else:
-        font_path = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf" # Для Linux
+_rate_limiter = RateLimiter()
+_event_bus = None
+_event_bus_lock = threading.Lock()
 
-    try:
-        font = ImageFont.truetype(font_path, final_font_size)
-    except:
-        # Якщо файл не знайдено, намагаємося завантажити системний шрифт за назвою
-        try:
-            font = ImageFont.truetype("arial.ttf", final_font_size)
-        except:
-            font = ImageFont.load_default()
-    
-    pil_color = (color[2], color[1], color[0])
-    
-    # 3. Малюємо тінь (чорна підкладка)
-    x, y = position
-    offset = max(1, int(final_font_size / 20)) # Товщина тіні залежить від розміру
-    draw.text((x + offset, y + offset), text, font=font, fill=(0, 0, 0))
-    
-    # Малюємо основний текст
-    draw.text(position, text, font=font, fill=pil_color)
-    
-    return cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
-
-def handle_event(user_id, gesture, frame):
-    global last_user_id, current_message, current_message_color, message_expiry_time, greeted_users
-    current_time = time.time()
-    
-    can_update_text = current_time > message_expiry_time
+def get_event_bus():
+    global _event_bus
+    with _event_bus_lock:
+        if _event_bus is None:
+            _event_bus = EventBus(_measured_dispatch)
+        return _event_bus
+
+def handle_event(user_id, gesture, overlay=None, stream_id=0):
+    """
+    Викликається з відеоциклу: лише публікує подію, реакції виконує диспетчер (dispatch_event).
+    Повідомлення на екрані малює draw_message щокадру
+    """
+    get_event_bus().publish(GestureEvent(user_id, gesture, time.time(), stream_id))
+
+def draw_message(overlay, stream_id=0):
+    """
+    Малює поточне повідомлення камери зі знімка; нічого не блокує
+    """
+    message = get_event_state(stream_id).message
+    if overlay is not None and message.text and time.time() <= message.expires_at:
+        overlay.banner(message.text, color=message.color, font_size=40)
+
+def _measured_dispatch(event):
+    # Час реакції на подію в потоці диспетчера (стадія "dispatch" у метриках)
+    with metrics.span("dispatch", event.stream_id):
+        dispatch_event(event)
+
+def dispatch_event(event):
+    """
+    Реакції на подію; виконується в потоці диспетчера подій, по одній події за раз
+    """
+    user_id, gesture, current_time, stream_id = event
+    ev = get_event_state(stream_id)
+    can_update_text = current_time > ev.message_expiry_time()
 
     # --- ЛОГІКА ОБЛИЧЧЯ (Тільки один раз для кожного) ---
     if user_id:
-        # Оновлюємо активного юзера для голосу (це ми вже робили)
-        state.user_id = user_id
+        # Оновлюємо активного юзера для голосу
+        state.set_user(user_id)
         
         # ПЕРЕВІРКА: Чи ми вже вітали цю конкретну людину?
-        if user_id not in greeted_users:
-            current_message = f"Привіт, {user_id}!"
-            current_message_color = (0, 255, 0)
-            speak_async(f"Привіт, {user_id}. Рада тебе бачити")
+        if user_id not in ev.greeted_users:
+            # Заморожуємо повідомлення на екрані
+            ev.show(f"Привіт, {user_id}!", (0, 255, 0), 4.0, current_time)
+            _speak(greeting_text(user_id), PRIORITY_LOW)
             
             # Додаємо в список "привітаних", щоб не повторювати
-            greeted_users.add(user_id)
-            
-            # Заморожуємо повідомлення на екрані
-            message_expiry_time = current_time + 4.0
-            last_user_id = user_id
+            ev.greeted_users.add(user_id)
+            ev.last_user_id = user_id
 
     # --- ЛОГІКА ЖЕСТІВ ---
-    if gesture and (current_time - last_event_time["gesture"] > COOLDOWN_SEC):
-        last_event_time["gesture"] = current_time
-        
+    # Загальний cooldown жестів камери та окремий для кожної пари (користувач, жест)
+    if gesture and _rate_limiter.allow((stream_id, "gesture"), COOLDOWN_SEC, current_time):
         # Оновлюємо активного користувача для команд, якщо є жест
-        state.active_user = user_id
-        state.last_active_time = current_time
-
-        if can_update_text:
-            if gesture == "wave":
-                webbrowser.open("https://www.youtube.com")
-                current_message = "Відкриваю YouTube..."
-                current_message_color = (0, 255, 255)
-                speak_async("Відкриваю ютуб")
-                message_expiry_time = current_time + 2.0
-                
-            elif gesture == "thumbs_up":
-                current_message = "Круто!"
-                current_message_color = (0, 255, 0)
-                speak_async("Це просто круто")
-                message_expiry_time = current_time + 1.5
-            
-            elif gesture == "victory":
-                current_message = "Перемога!"
-                current_message_color = (255, 0, 255)
-                speak_async("Все буде Україна")
-                message_expiry_time = current_time + 2.0
-
-    # Очищення тексту після завершення таймера
-    if gesture is None and can_update_text:
-        current_message = ""
-
-    # Малювання (current_message малюється тільки якщо воно не порожнє)
-    if current_message:
-        temp_frame = draw_ukr_text(frame, current_message, (20, 40), font_size=40, color=current_message_color)
-        np.copyto(frame, temp_frame)
\ No newline at end of file
+        state.activate(user_id, current_time)
+
+        # Дія береться зі скомпільованої таблиці gesture_actions (core.actions): (жест, користувач) -> дія
+        action = get_action_table().lookup(gesture, user_id) if can_update_text else None
+        if action is not None and _rate_limiter.allow((stream_id, user_id, gesture), action.cooldown, current_time):
+            run_action(action, ev, user_id, current_time)
+
+def run_action(action, ev, user_id, current_time):
+    payload = action.payload
+    if action.action_type == "open_url":
+        _open_url(payload["url"])
+    elif action.action_type == "open_app" and SIDE_EFFECTS_ENABLED:
+        get_event_bus().run_blocking(open_app, payload["app"])
+
+    if payload.get("message"):
+        ev.show(payload["message"].replace("{user}", str(user_id)), tuple(payload.get("color", (0, 255, 0))),
+                payload.get("duration", 2.0), current_time)
+    if payload.get("say"):
+        _speak(payload["say"].replace("{user}", str(user_id)))
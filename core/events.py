@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from collections import deque, namedtuple
+
+# Подія від відеоциклу: незмінна, тож її безпечно передавати між потоками
+GestureEvent = namedtuple("GestureEvent", ["user_id", "gesture", "timestamp", "stream_id"])
+
+# Повідомлення на екрані камери. UI читає лише такий знімок, диспетчер замінює його цілком
+MessageSnapshot = namedtuple("MessageSnapshot", ["text", "color", "expires_at"])
+EMPTY_MESSAGE = MessageSnapshot("", (0, 255, 0), 0.0)
+
+
+class RateLimiter:
+    """
+    Cooldown за ключем (наприклад, (камера, користувач, дія)).
+    Використовується лише з потоку диспетчера, тож блокування не потрібні
+    """
+
+    def __init__(self):
+        self._last = {}
+
+    def allow(self, key, cooldown, now):
+        last = self._last.get(key)
+        if last is not None and now - last <= cooldown:
+            return False
+        self._last[key] = now
+        return True
+
+
+class EventBus:
+    """
+    Асинхронна обробка подій жестів.
+
+    publish() викликається з відеоциклу й не блокує: подія додається в обмежений deque
+    (при переповненні викидається найстаріша), а asyncio-цикл у власному потоці розбирає чергу
+    і викликає handler(event). Повільні дії handler запускає через run_blocking, тож вони
+    не затримують ні кадр, ні наступні події.
+    """
+
+    def __init__(self, handler, maxlen=256):
+        self.handler = handler
+        self.dropped = 0
+        self._events = deque(maxlen=maxlen)
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = asyncio.Event()
+        self._scheduled = False
+        self._thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+        self._thread.start()
+
+    def publish(self, event):
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(event)  # append у deque атомарний
+        if not self._scheduled:
+            # Один виклик на пачку подій, а не на кожну
+            self._scheduled = True
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def run_blocking(self, func, *args):
+        """
+        Запуск блокуючої дії (браузер, програма) у пулі потоків без очікування результату
+        """
+        future = self._loop.run_in_executor(None, func, *args)
+        future.add_done_callback(self._report_error)
+        return future
+
+    @staticmethod
+    def _report_error(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ Помилка дії: {future.exception()}")
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._dispatch())
+
+    async def _dispatch(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            self._scheduled = False
+            while self._events:
+                event = self._events.popleft()
+                try:
+                    self.handler(event)
+                except Exception as e:
+                    print(f"⚠️ Помилка обробки події {event}: {e}")
+
+    def wait_idle(self, timeout=1.0):
+        """
+        Чекає, поки черга спорожніє (replay_benchmark — перед звітом по кліпу)
+        """
+        deadline = time.monotonic() + timeout
+        while self._events and time.monotonic() < deadline:
+            time.sleep(0.001)
@@ -0,0 +1,287 @@
+"""
+Метрики пайплайну: гістограми часу стадій (спани з core.timing), лічильники облич / рук / жестів / подій,
+затримка кадру. Експорт — текстовий формат Prometheus на localhost, періодичні JSON-логи та HUD на кадрі.
+
+Поки metrics.enabled = False, frame() не відкриває кадр, тож stage() у коді повертає порожній
+контекст і заміри нічого не коштують.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.timing import _NULL_TIMER, begin_frame, current_frame, end_frame
+
+# Межі бакетів гістограм у секундах (1 мс ... 1 с)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """
+    Кумулятивна гістограма з фіксованими бакетами + EMA для HUD (поточна, а не середня за весь час)
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, ema_alpha=0.1):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # останній — +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.ema = None
+        self.ema_alpha = ema_alpha
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.ema = value if self.ema is None else self.ema + self.ema_alpha * (value - self.ema)
+
+    def quantile(self, q):
+        """
+        Оцінка квантиля за бакетами (лінійна інтерполяція всередині бакета)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if n and seen + n >= rank:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return self.buckets[-1]
+
+
+class _Span:
+    __slots__ = ("registry", "name", "stream_id", "start")
+
+    def __init__(self, registry, name, stream_id):
+        self.registry = registry
+        self.name = name
+        self.stream_id = stream_id
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record_stages({self.name: time.perf_counter() - self.start}, self.stream_id)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = False
+        self.hud = False  # малювати HUD на кадрі (draw_hud)
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}   # (назва, stream_id, стадія) -> Histogram
+        self._counters = {}     # (назва, stream_id) -> int
+        self._last_frame = {}   # stream_id -> perf_counter останнього кадру (для FPS)
+        self._fps = {}          # stream_id -> EMA FPS
+
+    # --- Запис ---
+    @contextmanager
+    def frame(self, stream_id=0):
+        """
+        with metrics.frame(stream_id): ... — збирає спани stage() блоку в гістограми стадій.
+        Якщо кадр у цьому потоці вже відкрито (бенчмарк), спани лишаються зовнішньому власнику
+        """
+        if not self.enabled or current_frame() is not None:
+            yield None
+            return
+        timings = begin_frame()
+        try:
+            yield timings
+        finally:
+            end_frame()
+            self.record_stages(timings.stages, stream_id)
+
+    def span(self, name, stream_id=0):
+        """
+        with metrics.span("dispatch"): ... — окремий замір поза кадром (наприклад, у потоці диспетчера подій)
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Span(self, name, stream_id)
+
+    def record_stages(self, stages, stream_id=0):
+        with self._lock:
+            for name, seconds in stages.items():
+                self._histogram("stage_seconds", stream_id, name).observe(seconds)
+
+    def observe_frame(self, seconds, stream_id=0):
+        """
+        Повна затримка кадру (від захоплення до готового зображення) і FPS камери
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            self._histogram("frame_seconds", stream_id, None).observe(seconds)
+            last = self._last_frame.get(stream_id)
+            self._last_frame[stream_id] = now
+            if last is not None and now > last:
+                fps = 1.0 / (now - last)
+                prev = self._fps.get(stream_id)
+                self._fps[stream_id] = fps if prev is None else prev + 0.1 * (fps - prev)
+
+    def count(self, stream_id=0, **values):
+        """
+        metrics.count(0, faces=2, hands=1) — додає до лічильників камери
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, value in values.items():
+                key = (name, stream_id)
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def _histogram(self, name, stream_id, stage):
+        key = (name, stream_id, stage)
+        hist = self._histograms.get(key)
+        if hist is None:
+            hist = Histogram(self.buckets)
+            self._histograms[key] = hist
+        return hist
+
+    # --- Експорт ---
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            by_name = {}
+            for (name, stream_id, stage), hist in sorted(self._histograms.items(), key=lambda kv: str(kv[0])):
+                by_name.setdefault(name, []).append((stream_id, stage, hist))
+            for name, items in by_name.items():
+                metric = f"assistant_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for stream_id, stage, hist in items:
+                    labels = f'stream="{stream_id}"' + (f',stage="{stage}"' if stage is not None else "")
+                    cumulative = 0
+                    for bound, n in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"{metric}_sum{{{labels}}} {hist.sum:.6f}")
+                    lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+            for name in sorted({name for name, _ in self._counters}):
+                metric = f"assistant_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter, stream_id), value in sorted(self._counters.items(), key=lambda kv: str(kv[0])):
+                    if counter == name:
+                        lines.append(f'{metric}{{stream="{stream_id}"}} {value}')
+
+            if self._fps:
+                lines.append("# TYPE assistant_fps gauge")
+                for stream_id, fps in sorted(self._fps.items(), key=lambda kv: str(kv[0])):
+                    lines.append(f'assistant_fps{{stream="{stream_id}"}} {fps:.2f}')
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Стан метрик для JSON: мс (mean/p50/p95/p99) по стадіях, лічильники, FPS
+        """
+        def summary(hist):
+            return {
+                "count": hist.count,
+                "mean": round(hist.sum / hist.count * 1000, 3) if hist.count else 0.0,
+                "p50": round(hist.quantile(0.5) * 1000, 3),
+                "p95": round(hist.quantile(0.95) * 1000, 3),
+                "p99": round(hist.quantile(0.99) * 1000, 3),
+            }
+
+        streams = {}
+        with self._lock:
+            for (name, stream_id, stage), hist in self._histograms.items():
+                entry = streams.setdefault(str(stream_id), {"stages_ms": {}, "counters": {}})
+                if name == "frame_seconds":
+                    entry["frame_ms"] = summary(hist)
+                else:
+                    entry["stages_ms"][stage] = summary(hist)
+            for (name, stream_id), value in self._counters.items():
+                streams.setdefault(str(stream_id), {"stages_ms": {}, "counters": {}})["counters"][name] = value
+            for stream_id, fps in self._fps.items():
+                streams.setdefault(str(stream_id), {"stages_ms": {}, "counters": {}})["fps"] = round(fps, 2)
+        return {"timestamp": time.time(), "streams": streams}
+
+    def hud_lines(self, stream_id=0, max_stages=6):
+        """
+        Короткі рядки для HUD: FPS та поточний час найдорожчих стадій (EMA, мс)
+        """
+        with self._lock:
+            fps = self._fps.get(stream_id)
+            stages = [
+                (stage, hist.ema) for (name, sid, stage), hist in self._histograms.items()
+                if name == "stage_seconds" and sid == stream_id and hist.ema is not None
+            ]
+            frame = self._histograms.get(("frame_seconds", stream_id, None))
+        lines = [f"FPS {fps:.1f}" if fps else "FPS -"]
+        if frame is not None and frame.ema is not None:
+            lines[0] += f"  frame {frame.ema * 1000:.1f} ms"
+        for stage, ema in sorted(stages, key=lambda s: -s[1])[:max_stages]:
+            lines.append(f"{stage:<10}{ema * 1000:6.1f} ms")
+        return lines
+
+
+metrics = MetricsRegistry()
+
+
+def draw_hud(overlay, stream_id, frame_height, color=(0, 255, 255)):
+    """
+    Налагоджувальний HUD у лівому нижньому куті кадру
+    """
+    if not (metrics.enabled and metrics.hud) or overlay is None:
+        return
+    lines = metrics.hud_lines(stream_id)
+    y = frame_height - 12 - 22 * (len(lines) - 1)
+    for line in lines:
+        overlay.label(line, (10, y), color, scale=0.55, thickness=1)
+        y += 22
+
+
+def start_http_server(port=9108, host="127.0.0.1", registry=metrics):
+    """
+    GET /metrics — текстовий формат Prometheus. Сервер працює у фоновому потоці
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"[METRICS] http://{host}:{port}/metrics")
+    return server
+
+
+def start_json_log(interval=10.0, path=None, registry=metrics):
+    """
+    Кожні interval секунд дописує знімок метрик одним JSON-рядком у файл (або stdout)
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            line = json.dumps(registry.snapshot(), ensure_ascii=False)
+            if path:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            else:
+                print(line, file=sys.stdout, flush=True)
+
+    threading.Thread(target=run, name="metrics-log", daemon=True).start()
+    return stop
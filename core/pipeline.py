@@ -0,0 +1,286 @@
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """
+    Обмежена потокобезпечна черга.
+    При переповненні викидає найстаріший елемент, тож споживач завжди бачить свіжі дані.
+    """
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Повертає найстаріший елемент або None, якщо за timeout нічого не з'явилось
+        """
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StageStats:
+    """
+    Лічильники для однієї стадії: FPS (за ковзним вікном) та затримка обробки.
+    """
+
+    def __init__(self, name, window=30):
+        self.name = name
+        self.frames = 0
+        self.last_latency = 0.0
+        self.avg_latency = 0.0
+        self._stamps = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_sec):
+        now = time.perf_counter()
+        with self._lock:
+            self.frames += 1
+            self.last_latency = latency_sec
+            # Експоненційне згладжування, щоб не тримати всю історію
+            if self.frames == 1:
+                self.avg_latency = latency_sec
+            else:
+                self.avg_latency = 0.9 * self.avg_latency + 0.1 * latency_sec
+            self._stamps.append(now)
+
+    @property
+    def fps(self):
+        with self._lock:
+            if len(self._stamps) < 2:
+                return 0.0
+            span = self._stamps[-1] - self._stamps[0]
+            return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        return {
+            "frames": self.frames,
+            "fps": round(self.fps, 1),
+            "latency_ms": round(self.avg_latency * 1000, 1),
+        }
+
+
+class FramePacket:
+    """
+    Кадр, що рухається пайплайном. frame_id — монотонний номер для злиття результатів.
+    """
+
+    __slots__ = ("frame_id", "frame", "timestamp")
+
+    def __init__(self, frame_id, frame, timestamp):
+        self.frame_id = frame_id
+        self.frame = frame
+        self.timestamp = timestamp
+
+
+class LatestFrameSlot:
+    """
+    Слот на один кадр: capture-потік лише перезаписує його, тому старі кадри не накопичуються.
+    """
+
+    def __init__(self):
+        self._packet = None
+        self._cond = threading.Condition()
+
+    def publish(self, packet):
+        with self._cond:
+            self._packet = packet
+            self._cond.notify_all()
+
+    def wait_newer(self, last_id, timeout=None):
+        with self._cond:
+            if self._packet is None or self._packet.frame_id <= last_id:
+                self._cond.wait(timeout)
+            if self._packet is None or self._packet.frame_id <= last_id:
+                return None
+            return self._packet
+
+
+class CaptureStage(threading.Thread):
+    """
+    Безперервно читає джерело (cv2.VideoCapture) і тримає лише найновіший кадр.
+    """
+
+    def __init__(self, cap, slot, stop_event):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.slot = slot
+        self.stop_event = stop_event
+        self.stats = StageStats("capture")
+        self.finished = threading.Event()
+
+    def run(self):
+        frame_id = 0
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.slot.publish(FramePacket(frame_id, frame, time.perf_counter()))
+            self.stats.record(time.perf_counter() - start)
+            frame_id += 1
+        self.finished.set()
+
+
+class WorkerStage(threading.Thread):
+    """
+    Стадія інференсу: бере пакет зі своєї черги, викликає fn(packet) і віддає результат на злиття.
+    """
+
+    def __init__(self, name, fn, results, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.results = results
+        self.stop_event = stop_event
+        self.inbox = DropOldestQueue(maxsize=1)
+        self.stats = StageStats(name)
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def submit(self, packet):
+        self._idle.clear()
+        self.inbox.put(packet)
+
+    def wait_idle(self, timeout=None):
+        return self._idle.wait(timeout)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            packet = self.inbox.get(timeout=0.1)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result = self.fn(packet)
+            except Exception as e:
+                print(f"[PIPE] Помилка у стадії {self.name}: {e}")
+                result = None
+            self.stats.record(time.perf_counter() - start)
+            self.results.put((self.name, packet, result))
+            self._idle.set()
+
+
+class FrameDispatcher(threading.Thread):
+    """
+    Роздає один і той самий кадр усім стадіям інференсу одночасно.
+    Новий кадр береться, лише коли всі стадії вільні, тому всі вони працюють над спільним frame_id,
+    а пропускна здатність визначається найповільнішою стадією, а не сумою всіх.
+    """
+
+    def __init__(self, slot, stages, stop_event):
+        super().__init__(name="dispatcher", daemon=True)
+        self.slot = slot
+        self.stages = stages
+        self.stop_event = stop_event
+
+    def run(self):
+        last_id = -1
+        while not self.stop_event.is_set():
+            if not all(stage.wait_idle(timeout=0.1) for stage in self.stages):
+                continue
+            packet = self.slot.wait_newer(last_id, timeout=0.1)
+            if packet is None:
+                continue
+            last_id = packet.frame_id
+            for stage in self.stages:
+                stage.submit(packet)
+
+
+class FusionStage(threading.Thread):
+    """
+    Збирає результати стадій за frame_id. Повністю зібраний кадр іде у вихідну чергу,
+    незавершені старіші кадри відкидаються.
+    """
+
+    def __init__(self, stage_names, results, output, stop_event):
+        super().__init__(name="fusion", daemon=True)
+        self.stage_names = set(stage_names)
+        self.results = results
+        self.output = output
+        self.stop_event = stop_event
+        self.stats = StageStats("fusion")
+        self._pending = {}
+
+    def run(self):
+        while not self.stop_event.is_set():
+            item = self.results.get(timeout=0.1)
+            if item is None:
+                continue
+            name, packet, result = item
+            entry = self._pending.setdefault(packet.frame_id, {"packet": packet, "results": {}})
+            entry["results"][name] = result
+
+            if self.stage_names.issubset(entry["results"]):
+                del self._pending[packet.frame_id]
+                for frame_id in [fid for fid in self._pending if fid < packet.frame_id]:
+                    del self._pending[frame_id]
+                self.stats.record(time.perf_counter() - packet.timestamp)
+                self.output.put((packet, entry["results"]))
+
+
+class FramePipeline:
+    """
+    Багатопотоковий пайплайн: capture → (паралельні стадії інференсу) → fusion → render.
+
+    stages: словник {назва_стадії: fn(packet) -> результат}.
+    Рендер виконується у потоці, що викликає get_result (для cv2.imshow це має бути головний потік).
+    """
+
+    def __init__(self, cap, stages, output_size=2):
+        self.stop_event = threading.Event()
+        self.slot = LatestFrameSlot()
+        self.results = DropOldestQueue(maxsize=4 * len(stages))
+        self.output = DropOldestQueue(maxsize=output_size)
+
+        self.capture = CaptureStage(cap, self.slot, self.stop_event)
+        self.workers = [WorkerStage(name, fn, self.results, self.stop_event) for name, fn in stages.items()]
+        self.dispatcher = FrameDispatcher(self.slot, self.workers, self.stop_event)
+        self.fusion = FusionStage(stages.keys(), self.results, self.output, self.stop_event)
+        self.render_stats = StageStats("render")
+
+    def start(self):
+        for thread in [self.capture, *self.workers, self.dispatcher, self.fusion]:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in [self.capture, *self.workers, self.dispatcher, self.fusion]:
+            thread.join(timeout=1.0)
+
+    @property
+    def finished(self):
+        return self.capture.finished.is_set() and len(self.output) == 0
+
+    def get_result(self, timeout=0.1):
+        """
+        Повертає (packet, {назва_стадії: результат}) або None
+        """
+        return self.output.get(timeout=timeout)
+
+    def stats(self):
+        all_stats = [self.capture.stats, *(w.stats for w in self.workers), self.fusion.stats, self.render_stats]
+        return {s.name: s.snapshot() for s in all_stats}
+
+    def format_stats(self):
+        parts = [f"{name}: {s['fps']} fps {s['latency_ms']} ms" for name, s in self.stats().items()]
+        return " | ".join(parts)
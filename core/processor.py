@@ -0,0 +1,147 @@
+import time
+from core.association import HAND_PADDING_X, HAND_PADDING_Y, associate_hands
+from core.controller import draw_message, handle_event
+from core.metrics import draw_hud, metrics
+from core.timing import stage
+from utils.overlay import OverlayBuffer
+
+
+# Запас навколо зони руки (див. association_costs) для ROI-режиму, щоб рука з центром на межі потрапила в кроп цілком
+HAND_MARGIN = 120
+
+def hand_search_region(face_bbox, frame_shape, margin=HAND_MARGIN):
+    """
+    Область кадру [x1, y1, x2, y2], у якій шукати руки користувача (та сама зона, що в association_costs),
+    обрізана межами кадру. None, якщо область порожня
+    """
+    h, w = frame_shape[:2]
+    fx1, fy1, fx2, fy2 = face_bbox
+    x1 = max(0, int(fx1 - HAND_PADDING_X - margin))
+    y1 = max(0, int(fy1 - margin))
+    x2 = min(w, int(fx2 + HAND_PADDING_X + margin))
+    y2 = min(h, int(fy2 + HAND_PADDING_Y + margin))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1, y1, x2, y2)
+
+
+class FrameProcessor:
+    """
+    Повна обробка одного кадру: обличчя → руки/жести → події → overlay.
+    Спільна для вікна (main.py), headless-режиму та бенчмарків.
+    """
+
+    def __init__(self, face_tracker, gesture_predictor, compositor, event_handler=handle_event, stream_id=0,
+                 roi_hands=False, adaptive=None):
+        """
+        face_tracker — окремий для кожної камери; gesture_predictor і моделі облич можна ділити між камерами.
+        roi_hands — шукати руки лише в областях навколо облич знайомих користувачів, а не на всьому кадрі.
+        adaptive — face.adaptive.AdaptiveFaceController цієї камери (підбір якості детекції під цільовий FPS)
+        """
+        self.adaptive = adaptive
+        if adaptive is not None:
+            face_tracker.detect_options = adaptive.options
+            if adaptive.uses_light:
+                face_tracker.embedder.preload_light()
+        self.stream_id = stream_id
+        self.roi_hands = roi_hands
+        self.last_users = []  # останні обличчя; в пайплайні руки того ж кадру рахуються паралельно з ними
+        self.face_tracker = face_tracker
+        self.gesture_predictor = gesture_predictor
+        self.compositor = compositor
+        self.event_handler = event_handler
+
+    def new_overlay(self):
+        return OverlayBuffer(enabled=self.compositor.enabled)
+
+    def process(self, frame):
+        """
+        Послідовна обробка кадру. Повертає (кадр для показу, обличчя, жести)
+        """
+        start = time.perf_counter()
+        with metrics.frame(self.stream_id):
+            overlay = self.new_overlay()
+            recognized_users = self._update_faces(frame)
+            gestures = self.predict_gestures(frame, overlay, recognized_users)
+            self.process_results(recognized_users, gestures, overlay)
+            draw_hud(overlay, self.stream_id, frame.shape[0])
+            # Інференс уже завершено, тож малюємо прямо на кадрі
+            frame = self.render(frame, overlay, copy=False)
+        elapsed = time.perf_counter() - start
+        self._adapt(elapsed)
+        metrics.observe_frame(elapsed, self.stream_id)
+        return frame, recognized_users, gestures
+
+    def detect_faces(self, frame):
+        """
+        Лише обличчя (стадія пайплайну). Руки там рахуються паралельно, тож під цільовий FPS
+        підлаштовується час саме цієї стадії
+        """
+        start = time.perf_counter()
+        with metrics.frame(self.stream_id):
+            users = self._update_faces(frame)
+        self._adapt(time.perf_counter() - start)
+        return users
+
+    def _update_faces(self, frame):
+        users = self.face_tracker.update(frame)
+        self.last_users = users
+        return users
+
+    def _adapt(self, frame_seconds):
+        if self.adaptive is not None and self.adaptive.observe(frame_seconds):
+            self.face_tracker.detect_options = self.adaptive.options
+
+    def predict_gestures(self, frame, overlay, users=None):
+        """
+        users — обличчя цього кадру для ROI-режиму; якщо їх ще немає (пайплайн), беруться останні відомі
+        """
+        regions = None
+        if self.roi_hands:
+            users = self.last_users if users is None else users
+            regions = [region for user in users if user["user_id"]
+                       for region in [hand_search_region(user["bbox"], frame.shape)] if region is not None]
+        return self.gesture_predictor.predict_gestures(frame, overlay, stream_id=self.stream_id, regions=regions)
+
+    def render(self, frame, overlay, copy=True):
+        with stage("render"):
+            return self.compositor.render(frame, overlay, copy=copy)
+
+    def process_results(self, recognized_users, gestures, overlay):
+        """
+        Додає рамки й підписи в overlay і запускає події для жестів знайомих користувачів
+        """
+        with stage("events"):
+            # Обробка облич
+            for user in recognized_users:
+                user_id = user["user_id"]
+                x1, y1, x2, y2 = user["bbox"]
+                color = (0, 255, 0) if user_id else (0, 0, 255)
+                overlay.rect(user["bbox"], color, 2)
+
+                label = user_id if user_id else "Невідомо"
+                overlay.text(label, (x1, y1 - 35), color, font_size=28)
+
+            # Кожна рука отримує не більше одного власника (взаємно однозначне призначення рук обличчям),
+            # тож рука між двома людьми не запускає подію для обох
+            owners = associate_hands(gestures, recognized_users)
+            events = 0
+
+            # Обробка жестів
+            for g, owner in zip(gestures, owners):
+                g["user_id"] = recognized_users[owner]["user_id"] if owner is not None else None
+                if not g["gesture"]: continue
+
+                gx1, gy1, gx2, gy2 = g["bbox"]
+                overlay.label(g["gesture"], (gx1, gy1 - 10), (255, 255, 0))
+
+                if g["user_id"]:
+                    self.event_handler(user_id=g["user_id"], gesture=g["gesture"], overlay=overlay,
+                                       stream_id=self.stream_id)
+                    events += 1
+
+            # Повідомлення камери (вітання, реакції) — зі знімка, який оновлює диспетчер подій
+            draw_message(overlay, self.stream_id)
+
+        metrics.count(self.stream_id, frames=1, faces=len(recognized_users), hands=len(gestures),
+                      gestures=sum(1 for g in gestures if g["gesture"]), events=events)
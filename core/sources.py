@@ -0,0 +1,52 @@
+import os
+import cv2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+class ImageDirectorySource:
+    """
+    Папка з кадрами (відсортованими за назвою) з тим самим інтерфейсом, що й cv2.VideoCapture
+    """
+
+    def __init__(self, path, loop=False):
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.loop = loop
+        self._pos = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self):
+        while self._pos < len(self.paths) or (self.loop and self.paths):
+            if self._pos >= len(self.paths):
+                self._pos = 0
+            frame = cv2.imread(self.paths[self._pos])
+            self._pos += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        pass
+
+
+def open_source(source):
+    """
+    Відкриває джерело кадрів:
+      - "0", "1" або int — вебкамера з таким індексом
+      - папка — послідовність зображень
+      - шлях до відеофайлу або URL (rtsp://, http://) — через cv2.VideoCapture
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        cap = cv2.VideoCapture(int(source))
+    elif os.path.isdir(source):
+        cap = ImageDirectorySource(source)
+    else:
+        cap = cv2.VideoCapture(source)
+
+    if not cap.isOpened():
+        raise IOError(f"Не вдалося відкрити джерело кадрів: {source}")
+    return cap
@@ -0,0 +1,211 @@
+"""
+Рушії розпізнавання мовлення для голосового асистента.
+
+    google — speech_recognition.recognize_google (мережа, лише фінальний текст)
+    vosk   — локальна модель Vosk без мережі; граматика обмежена ключовими фразами з assistant.db,
+             проміжні гіпотези йдуть у обробник одразу, тож команда може спрацювати до кінця фрази
+
+Перевірка на записі без мікрофона й мережі:
+    python -m core.speech command.wav --backend vosk --model models/vosk-uk
+"""
+import argparse
+import json
+import threading
+import wave
+from abc import ABC, abstractmethod
+import speech_recognition as sr
+
+SAMPLE_RATE = 16000
+CHUNK_FRAMES = 4000  # ~0.25 с при 16 кГц
+
+
+class SpeechHandler:
+    """
+    Отримувач результатів розпізнавання. on_partial повертає True, якщо фразу вже оброблено
+    (тоді фінальний результат цієї фрази ігнорується)
+    """
+
+    def on_partial(self, text):
+        return False
+
+    def on_final(self, text):
+        pass
+
+
+class SpeechBackend(ABC):
+    streaming = False
+
+    @abstractmethod
+    def transcribe_wav(self, path, handler=None):
+        """
+        Розпізнає WAV-файл. Повертає фінальний текст; проміжні гіпотези (якщо є) йдуть у handler
+        """
+
+    @abstractmethod
+    def start(self, microphone, handler):
+        """
+        Фонове прослуховування мікрофона. Повертає функцію зупинки
+        """
+
+
+class GoogleSpeechBackend(SpeechBackend):
+    def __init__(self, language="uk-UA", recognizer=None):
+        self.language = language
+        self.recognizer = recognizer or sr.Recognizer()
+
+    def transcribe(self, audio):
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).lower()
+        except sr.UnknownValueError:
+            return ""
+
+    def transcribe_wav(self, path, handler=None):
+        with sr.AudioFile(path) as source:
+            audio = self.recognizer.record(source)
+        text = self.transcribe(audio)
+        if handler is not None and text:
+            handler.on_final(text)
+        return text
+
+    def start(self, microphone, handler):
+        with microphone as source:
+            self.recognizer.adjust_for_ambient_noise(source, duration=1)
+
+        def callback(rec, audio):
+            try:
+                text = self.transcribe(audio)
+                if text:
+                    handler.on_final(text)
+                else:
+                    print("Не розпізнано слів")
+            except Exception as e:
+                print(f"🎙 Помилка розпізнавання: {e}")
+
+        return self.recognizer.listen_in_background(microphone, callback)
+
+
+class VoskSpeechBackend(SpeechBackend):
+    """
+    Офлайн-розпізнавання Vosk. grammar — список фраз (ключові слова команд і програм):
+    з обмеженою граматикою модель шукає лише їх, що і швидше, і точніше для коротких команд
+    """
+    streaming = True
+
+    def __init__(self, model_path, grammar=None, sample_rate=SAMPLE_RATE):
+        import vosk
+
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+        self.sample_rate = sample_rate
+        self.grammar = sorted(set(grammar)) if grammar else None
+
+    def _new_recognizer(self, sample_rate=None):
+        rate = sample_rate or self.sample_rate
+        if self.grammar:
+            return self._vosk.KaldiRecognizer(self.model, rate, json.dumps(self.grammar + ["[unk]"], ensure_ascii=False))
+        return self._vosk.KaldiRecognizer(self.model, rate)
+
+    @staticmethod
+    def _clean(text):
+        return " ".join(word for word in text.split() if word != "[unk]")
+
+    def stream(self, chunks, handler, sample_rate=None):
+        """
+        Розпізнає потік PCM 16 біт моно. Для кожної фрази: проміжні гіпотези -> handler.on_partial,
+        кінець фрази -> handler.on_final (якщо on_partial ще не обробив її). Повертає фінальні тексти
+        """
+        rec = self._new_recognizer(sample_rate)
+        finals = []
+        handled, last_partial = False, ""
+
+        def finish(result):
+            nonlocal handled, last_partial
+            text = self._clean(json.loads(result).get("text", ""))
+            if text:
+                finals.append(text)
+                if not handled:
+                    handler.on_final(text)
+            handled, last_partial = False, ""
+
+        for chunk in chunks:
+            if rec.AcceptWaveform(chunk):
+                finish(rec.Result())
+                continue
+            partial = self._clean(json.loads(rec.PartialResult()).get("partial", ""))
+            if partial and partial != last_partial:
+                last_partial = partial
+                if not handled and handler.on_partial(partial):
+                    handled = True
+        finish(rec.FinalResult())
+        return finals
+
+    def transcribe_wav(self, path, handler=None):
+        with wave.open(path, "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                raise ValueError(f"{path}: потрібен WAV PCM 16 біт моно")
+            rate = wav.getframerate()
+            chunks = iter(lambda: wav.readframes(CHUNK_FRAMES), b"")
+            finals = self.stream(chunks, handler or SpeechHandler(), sample_rate=rate)
+        return " ".join(finals)
+
+    def start(self, microphone, handler):
+        stop = threading.Event()
+
+        def chunks(source):
+            while not stop.is_set():
+                yield source.stream.read(CHUNK_FRAMES)
+
+        def run():
+            try:
+                with microphone as source:
+                    self.stream(chunks(source), handler, sample_rate=source.SAMPLE_RATE)
+            except Exception as e:
+                print(f"🎙 Помилка розпізнавання: {e}")
+
+        threading.Thread(target=run, name="vosk", daemon=True).start()
+
+        def stopper(wait_for_stop=True):
+            stop.set()
+        return stopper
+
+
+def create_backend(name="google", model_path=None, grammar=None):
+    """
+    Рушій за назвою. Якщо Vosk або його модель недоступні — повертаємось до Google
+    """
+    if name == "vosk":
+        try:
+            return VoskSpeechBackend(model_path, grammar=grammar)
+        except Exception as e:
+            print(f"🎙 Vosk недоступний ({e}), використовую Google")
+    return GoogleSpeechBackend()
+
+
+class _PrintHandler(SpeechHandler):
+    def on_partial(self, text):
+        print(f"… {text}")
+        return False
+
+    def on_final(self, text):
+        print(f"= {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Розпізнавання WAV-файлу обраним рушієм")
+    parser.add_argument("wav")
+    parser.add_argument("--backend", choices=["google", "vosk"], default="vosk")
+    parser.add_argument("--model", default="models/vosk-uk")
+    parser.add_argument("--no-grammar", action="store_true", help="без обмеження ключовими фразами з бази")
+    args = parser.parse_args()
+
+    grammar = None
+    if args.backend == "vosk" and not args.no_grammar:
+        from core.commands import get_command_matcher
+        grammar = get_command_matcher().keywords()
+    backend = create_backend(args.backend, args.model, grammar)
+    backend.transcribe_wav(args.wav, _PrintHandler())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.pipeline import CaptureStage, LatestFrameSlot, StageStats
+
+
+class StreamContext:
+    """
+    Одна камера: власний capture-потік із найновішим кадром і власний FrameProcessor
+    (трекер облич, історія жестів і стан подій окремі, моделі — спільні).
+    """
+
+    def __init__(self, stream_id, cap, processor, stop_event):
+        self.stream_id = stream_id
+        self.cap = cap
+        self.processor = processor
+        self.slot = LatestFrameSlot()
+        self.capture = CaptureStage(cap, self.slot, stop_event)
+        self.stats = StageStats(f"stream{stream_id}")
+        self.last_frame_id = -1
+
+    def take_new_frame(self):
+        packet = self.slot.wait_newer(self.last_frame_id, timeout=0)
+        if packet is not None:
+            self.last_frame_id = packet.frame_id
+        return packet
+
+    @property
+    def finished(self):
+        return self.capture.finished.is_set()
+
+
+class MultiStreamScheduler:
+    """
+    Обробка кількох камер в одному процесі зі спільними моделями.
+
+    Робота йде раундами: у кожному раунді кожна камера, що має новий кадр, дає рівно один
+    (найновіший) кадр, тож швидка камера не витісняє повільну. Кадри раунду обробляються
+    разом у пулі потоків (ONNX Runtime і MediaPipe відпускають GIL), а черговість камер
+    зсувається щораунду.
+    """
+
+    def __init__(self, streams, workers=None, idle_sleep=0.002):
+        """
+        streams: список (stream_id, cap, processor)
+        """
+        self.stop_event = threading.Event()
+        self.streams = [StreamContext(sid, cap, proc, self.stop_event) for sid, cap, proc in streams]
+        self.pool = ThreadPoolExecutor(max_workers=workers or len(self.streams))
+        self.idle_sleep = idle_sleep
+        self._offset = 0
+
+    def start(self):
+        for stream in self.streams:
+            stream.capture.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for stream in self.streams:
+            stream.capture.join(timeout=1.0)
+        self.pool.shutdown(wait=True)
+
+    @property
+    def finished(self):
+        return all(stream.finished for stream in self.streams)
+
+    def _process(self, stream, packet):
+        start = time.perf_counter()
+        frame, faces, gestures = stream.processor.process(packet.frame)
+        stream.stats.record(time.perf_counter() - start)
+        return stream, frame, faces, gestures
+
+    def next_round(self):
+        """
+        Обробляє один раунд. Повертає [(stream, кадр для показу, обличчя, жести), ...]
+        """
+        order = self.streams[self._offset:] + self.streams[:self._offset]
+        self._offset = (self._offset + 1) % len(self.streams)
+
+        batch = [(stream, packet) for stream in order for packet in [stream.take_new_frame()] if packet is not None]
+        if not batch:
+            time.sleep(self.idle_sleep)
+            return []
+        return list(self.pool.map(lambda item: self._process(*item), batch))
+
+    def format_stats(self):
+        parts = []
+        for stream in self.streams:
+            s = stream.stats.snapshot()
+            parts.append(f"{stream.stats.name}: {s['fps']} fps {s['latency_ms']} ms")
+        return " | ".join(parts)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+# Таймінги стадій поточного кадру (окремо для кожного потоку)
+_local = threading.local()
+
+
+class FrameTimings:
+    """
+    Накопичує час стадій одного кадру: {"face": сек, "hands": сек, ...}
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+class _StageTimer:
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name, timings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def begin_frame():
+    """
+    Починає збір таймінгів для кадру в поточному потоці й повертає FrameTimings
+    """
+    timings = FrameTimings()
+    _local.timings = timings
+    return timings
+
+
+def end_frame():
+    timings = getattr(_local, "timings", None)
+    _local.timings = None
+    return timings
+
+
+def stage(name):
+    """
+    with stage("face"): ... — додає час блоку до поточного кадру.
+    Якщо кадр не відкрито через begin_frame, це порожній контекст без замірів.
+    """
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        return _NULL_TIMER
+    return _StageTimer(name, timings)
+
+
+def current_frame():
+    """
+    FrameTimings відкритого в цьому потоці кадру або None
+    """
+    return getattr(_local, "timings", None)
@@ -0,0 +1,85 @@
+from collections import deque
+
+# Рівні якості детекції облич: від найкращого до найдешевшого.
+# det_size — вхід детектора, scale — зменшення кадру перед детекцією,
+# light — легкий детектор (embedding завжди з основної моделі й повного кадру)
+DEFAULT_LEVELS = (
+    {"det_size": (640, 640), "scale": 1.0, "light": False},
+    {"det_size": (480, 480), "scale": 1.0, "light": False},
+    {"det_size": (320, 320), "scale": 0.75, "light": False},
+    {"det_size": (320, 320), "scale": 0.5, "light": True},
+    {"det_size": (256, 256), "scale": 0.5, "light": True},
+)
+
+
+class AdaptiveFaceController:
+    """
+    Підбирає рівень якості детекції облич під цільовий FPS.
+
+    Після кожного кадру отримує час його обробки; раз на window кадрів порівнює досяжний FPS
+    (1 / середній час) з target_fps. Ключові кадри значно дорожчі за трековані, тож вікно має
+    покривати кілька ключових кадрів. Якщо не встигаємо — рівень дешевшає; якщо є запас більше
+    upgrade_margin — повертаємось на якісніший. Після невдалого підвищення (довелося одразу
+    знизити) наступна спроба відкладається вдвічі довше, щоб рівні не "гойдалися".
+    """
+
+    def __init__(self, target_fps, levels=DEFAULT_LEVELS, window=30, upgrade_margin=1.3,
+                 start_level=0, verbose=True):
+        self.target_fps = target_fps
+        self.levels = list(levels)
+        self.window = window
+        self.upgrade_margin = upgrade_margin
+        self.level = start_level
+        self.verbose = verbose
+        self._samples = deque(maxlen=window)
+        self._upgrade_backoff = 1   # скільки вікон поспіль треба мати запас для підвищення
+        self._spare_windows = 0
+        self._last_change = None    # "up" / "down"
+
+    @property
+    def uses_light(self):
+        """
+        Чи є серед рівнів легкий детектор (його треба завантажити до старту)
+        """
+        return any(level.get("light") for level in self.levels)
+
+    @property
+    def options(self):
+        """
+        Параметри для FaceEmbedder.get_embeddings на поточному рівні
+        """
+        return dict(self.levels[self.level])
+
+    def observe(self, frame_seconds):
+        """
+        Час обробки одного кадру. Повертає True, якщо рівень змінився
+        """
+        self._samples.append(frame_seconds)
+        if len(self._samples) < self.window:
+            return False
+
+        fps = len(self._samples) / max(sum(self._samples), 1e-9)
+        self._samples.clear()
+
+        if fps < self.target_fps and self.level < len(self.levels) - 1:
+            if self._last_change == "up":
+                self._upgrade_backoff = min(self._upgrade_backoff * 2, 32)
+            return self._set_level(self.level + 1, fps, "down")
+
+        if fps > self.target_fps * self.upgrade_margin and self.level > 0:
+            self._spare_windows += 1
+            if self._spare_windows >= self._upgrade_backoff:
+                return self._set_level(self.level - 1, fps, "up")
+        else:
+            self._spare_windows = 0
+            if fps >= self.target_fps:
+                self._last_change = None  # рівень стабільний
+        return False
+
+    def _set_level(self, level, fps, direction):
+        self.level = level
+        self._spare_windows = 0
+        self._last_change = direction
+        if self.verbose:
+            print(f"[ADAPT] {fps:.1f} fps (ціль {self.target_fps}) -> рівень {level}: {self.levels[level]}")
+        return True
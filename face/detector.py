@@ -1,24 +1,19 @@
-from insightface.app import FaceAnalysis
 import numpy as np
+from face.models import get_face_models
 
 class FaceDetector:
-    def __init__(self, device: str = "cpu"):
-        self.device = device
-        self.app = FaceAnalysis(name="buffalo_l", providers=self._get_providers())
-        self.app.prepare(ctx_id=self._get_ctx_id())
-
-    def _get_ctx_id(self) -> int:
-        return 0 if self.device == "cuda" else -1
+    """
+    Лише детекція облич. Моделі спільні з FaceEmbedder (face.models), тож другий набір сесій не завантажується
+    """
 
-    def _get_providers(self):
-        if self.device == "cuda":
-            return ["CUDAExecutionProvider", "CPUExecutionProvider"]
-        return ["CPUExecutionProvider"]
+    def __init__(self, device: str = "cpu", model_name: str = "buffalo_l"):
+        self.device = device
+        self.models = get_face_models(model_name, device)
 
     def detect(self, frame_bgr: np.ndarray):
         """
         Повертає список bounding box облич
         """
-        faces = self.app.get(frame_bgr)
+        faces = self.models.detect(frame_bgr)
         bboxes = [face.bbox.astype(int).tolist() for face in faces]
         return bboxes
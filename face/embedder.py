@@ -1,67 +1,92 @@
-from insightface.app import FaceAnalysis
 import numpy as np
 import cv2
+from face.models import get_face_models
 
 class FaceEmbedder:
     """
     Клас для отримання 512-вимірних face embeddings через InsightFace (ArcFace).
+
+    Моделі беруться зі спільного реєстру (face.models), тож детектор, трекер і enrollment
+    у процесі ділять один набір ONNX-сесій. Стадії detect / align / embed доступні окремо.
     """
 
-    def __init__(self, device: str = "cpu"):
+    def __init__(self, device: str = "cpu", model_name: str = "buffalo_l", light_model_name: str = "buffalo_s"):
         """
         device: "cpu" або "cuda"
+        model_name: набір моделей InsightFace (за ним також ключуються закешовані embeddings)
+        light_model_name: легший набір, з якого береться лише детектор для режиму light
         """
         self.device = device
-        self.app = FaceAnalysis(
-            name="buffalo_l",  # модель високої якості
-            providers=self._get_providers()
-        )
-        self.app.prepare(ctx_id=self._get_ctx_id())
+        self.model_name = model_name
+        self.light_model_name = light_model_name
+        self.models = get_face_models(model_name, device)
+
+    def preload_light(self):
+        """
+        Завантажує легкий детектор заздалегідь (при старті), щоб перехід на light-рівень
+        не чекав на завантаження моделі й створення ONNX-сесії посеред кадру
+        """
+        self._detector_models(light=True)
+
+    def _detector_models(self, light):
+        if light:
+            return get_face_models(self.light_model_name, self.device, modules=("detection",))
+        return self.models
 
-    def _get_ctx_id(self) -> int:
-        # -1 означає CPU, 0 - GPU
-        return 0 if self.device == "cuda" else -1
+    def detect(self, frame_bgr: np.ndarray, det_size=None, scale: float = 1.0, light: bool = False):
+        """
+        Лише детекція: список Face (bbox, kps, det_score) у координатах повного кадру.
+
+        det_size: розмір входу детектора (w, h), кратний 32; None — як у prepare()
+        scale: кадр зменшується перед детекцією, рамки й точки масштабуються назад
+        light: детектор із light_model_name замість основного
+        """
+        return self._detector_models(light).detect(frame_bgr, det_size=det_size, scale=scale)
 
-    def _get_providers(self):
-        # Порядок провайдерів для onnxruntime
-        if self.device == "cuda":
-            return ["CUDAExecutionProvider", "CPUExecutionProvider"]
-        return ["CPUExecutionProvider"]
+    def embed_faces(self, frame_bgr: np.ndarray, faces):
+        """
+        Вирівнювання + ArcFace для вибраних облич кадру одним батчем. Повертає (N, 512)
+        """
+        return self.models.embed(self.models.align(frame_bgr, faces))
 
-    def get_embeddings(self, frame_bgr: np.ndarray):
+    def get_embeddings(self, frame_bgr: np.ndarray, det_size=None, scale: float = 1.0, light: bool = False):
         """
         Отримує список знайдених облич із bounding box і embedding.
 
         Аргументи:
             frame_bgr: кадр у форматі BGR (OpenCV)
+            det_size, scale, light: параметри детекції (див. detect); embedding завжди рахується
+                основною моделлю з повнороздільного кадру, тож він сумісний з галереєю
 
         Повертає:
             Список словників:
             [
               {
                 "bbox": [x1, y1, x2, y2],
+                "det_score": впевненість детектора,
                 "embedding": np.ndarray з формою (512,)
               },
               ...
             ]
         """
-        faces = self.app.get(frame_bgr)
+        faces = self.detect(frame_bgr, det_size=det_size, scale=scale, light=light)
+        embeddings = self.embed_faces(frame_bgr, faces)
 
         results = []
-        for face in faces:
+        for face, embedding in zip(faces, embeddings):
             results.append({
                 "bbox": face.bbox.astype(int).tolist(),
-                "embedding": face.embedding
+                "det_score": float(face.det_score),
+                "embedding": embedding
             })
 
         return results
 
     def draw_faces(self, frame_bgr, color=(0, 255, 0)):
         """
-        Промальовує рамки на кадрі (корисно для дебагу)
+        Промальовує рамки на кадрі (корисно для дебагу); лише детекція, без embedding
         """
-        faces = self.app.get(frame_bgr)
-        for face in faces:
+        for face in self.detect(frame_bgr):
             x1, y1, x2, y2 = face.bbox.astype(int)
             cv2.rectangle(frame_bgr, (x1, y1), (x2, y2), color, 2)
         return frame_bgr
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import cv2
+import numpy as np
+
+# Найбільша сторона фото перед детекцією. Однакова для embed_image і bulk_enroll: embedding
+# кешується за (шлях, модель), тож прототип не повинен залежати від того, який шлях побачив фото першим
+ENROLL_MAX_SIDE = 1280
+
+
+def load_image(path, max_side=ENROLL_MAX_SIDE):
+    img = cv2.imread(path)
+    if img is None:
+        return None
+    # Детектор усе одно працює на ~640px, тож великі фото зменшуємо (і до передачі між процесами)
+    h, w = img.shape[:2]
+    scale = max_side / max(h, w)
+    if scale < 1:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return img
+
+
+def embed_image(img_path, embedder, user_id, store=None):
+    """
+    Повертає embedding першого обличчя на фото (з кешу, якщо він актуальний) або None
+    """
+    if store is not None:
+        found, embedding = store.lookup(img_path)
+        if found:
+            return embedding
+
+    img = load_image(img_path)
+    if img is None:
+        return None
+    faces = embedder.get_embeddings(img)
+    embedding = faces[0]["embedding"] if faces else None
+
+    if store is not None:
+        store.save(img_path, user_id, embedding)
+    return embedding
+
+
+def enroll_user(user_id, image_paths, embedder, recognizer, store=None):
+    """
+    Додає фото користувача в галерею. Можна викликати під час роботи — перезапуск не потрібен.
+    Повертає кількість фото, з яких вдалося отримати обличчя.
+    """
+    added = 0
+    for img_path in image_paths:
+        embedding = embed_image(img_path, embedder, user_id, store)
+        if embedding is not None:
+            recognizer.add_user(user_id, embedding)
+            added += 1
+    return added
+
+
+def load_users_from_dict(data, embedder, recognizer, base_path="data", store=None):
+    for user_id, images in data.items():
+        print(f"[INFO] Завантаження користувача: {user_id}")
+        image_paths = [os.path.join(base_path, img_rel_path) for img_rel_path in images]
+        enroll_user(user_id, image_paths, embedder, recognizer, store)
+        print(f"[OK] {user_id} готовий\n")
+
+
+# --- Масове завантаження (онбординг цілого офісу) ---
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# Стан процесу-воркера: кожен процес тримає власну сесію FaceAnalysis
+_worker_embedder = None
+
+
+def _init_worker(model_name, device):
+    global _worker_embedder
+    from face.embedder import FaceEmbedder
+    _worker_embedder = FaceEmbedder(device=device, model_name=model_name)
+
+
+def _embed_worker(image):
+    return [
+        {"bbox": face["bbox"], "det_score": face["det_score"], "embedding": np.asarray(face["embedding"])}
+        for face in _worker_embedder.get_embeddings(image)
+    ]
+
+
+class EnrollmentResult:
+    """
+    Підсумок по одному фото. status: ok | cached | unreadable | no_face | multiple_faces | low_quality | error
+    """
+
+    __slots__ = ("user_id", "path", "status", "detail")
+
+    def __init__(self, user_id, path, status, detail=""):
+        self.user_id = user_id
+        self.path = path
+        self.status = status
+        self.detail = detail
+
+    @property
+    def ok(self):
+        return self.status in ("ok", "cached")
+
+    def to_dict(self):
+        return {"user_id": self.user_id, "path": self.path, "status": self.status, "detail": self.detail}
+
+
+def check_quality(faces, min_det_score, min_face_size):
+    """
+    Повертає (status, detail) для результату детекції одного фото
+    """
+    if not faces:
+        return "no_face", ""
+    if len(faces) > 1:
+        return "multiple_faces", f"{len(faces)} облич"
+    face = faces[0]
+    x1, y1, x2, y2 = face["bbox"]
+    if face["det_score"] < min_det_score:
+        return "low_quality", f"det_score={face['det_score']:.2f}"
+    if min(x2 - x1, y2 - y1) < min_face_size:
+        return "low_quality", f"обличчя {x2 - x1}x{y2 - y1}px"
+    return "ok", ""
+
+
+def _finish_job(job, user_id, path, recognizer, store, min_det_score, min_face_size):
+    try:
+        faces = job.result()
+    except Exception as e:
+        return EnrollmentResult(user_id, path, "error", str(e))
+
+    status, detail = check_quality(faces, min_det_score, min_face_size)
+    if status == "ok":
+        recognizer.add_user(user_id, faces[0]["embedding"])
+    if store is not None and status in ("ok", "no_face"):
+        store.save(path, user_id, faces[0]["embedding"] if faces else None)
+    return EnrollmentResult(user_id, path, status, detail)
+
+
+def bulk_enroll(items, recognizer, store=None, model_name="buffalo_l", device="cpu", workers=None,
+                decode_threads=8, min_det_score=0.6, min_face_size=40):
+    """
+    Паралельне завантаження великої кількості фото.
+
+    items: список (user_id, шлях_до_фото).
+    Фото з актуальним кешем у store не обробляються взагалі. Решта декодується пулом потоків
+    (cv2.imread відпускає GIL), а embeddings рахуються пулом процесів, де кожен воркер
+    тримає власну сесію FaceAnalysis. Результати пишуться у recognizer і store.
+
+    Повертає список EnrollmentResult для кожного фото.
+    """
+    results = []
+    pending = []
+    for user_id, path in items:
+        if store is not None:
+            found, embedding = store.lookup(path)
+            if found:
+                if embedding is None:
+                    results.append(EnrollmentResult(user_id, path, "no_face", "кеш"))
+                else:
+                    recognizer.add_user(user_id, embedding)
+                    results.append(EnrollmentResult(user_id, path, "cached"))
+                continue
+        pending.append((user_id, path))
+
+    if not pending:
+        return results
+
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    with ThreadPoolExecutor(max_workers=decode_threads) as decoders, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(model_name, device)) as embedders:
+        in_flight = {}
+        # Не тримаємо в пам'яті тисячі декодованих кадрів одночасно: декодуємо вікнами
+        max_in_flight = workers * 4
+        window = max_in_flight * 2
+
+        for start in range(0, len(pending), window):
+            chunk = pending[start:start + window]
+            decoded = {decoders.submit(load_image, path): (user_id, path) for user_id, path in chunk}
+            for future in as_completed(decoded):
+                user_id, path = decoded[future]
+                image = future.result()
+                if image is None:
+                    results.append(EnrollmentResult(user_id, path, "unreadable"))
+                    continue
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for job in done:
+                        results.append(_finish_job(job, *in_flight.pop(job), recognizer, store,
+                                                   min_det_score, min_face_size))
+                in_flight[embedders.submit(_embed_worker, image)] = (user_id, path)
+
+        for job in as_completed(list(in_flight)):
+            results.append(_finish_job(job, *in_flight.pop(job), recognizer, store, min_det_score, min_face_size))
+
+    return results
+
+
+def collect_directory(root):
+    """
+    Збирає фото зі структури root/<user_id>/*.jpg у список (user_id, шлях)
+    """
+    items = []
+    for user_id in sorted(os.listdir(root)):
+        user_dir = os.path.join(root, user_id)
+        if not os.path.isdir(user_dir):
+            continue
+        for name in sorted(os.listdir(user_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                items.append((user_id, os.path.join(user_dir, name)))
+    return items
+
+
+def main():
+    from face.recognizer import FaceRecognizer
+    from face.store import EmbeddingStore
+
+    parser = argparse.ArgumentParser(description="Масове завантаження облич у галерею (root/<user_id>/*.jpg)")
+    parser.add_argument("root", help="папка з підпапками користувачів")
+    parser.add_argument("--model", default="buffalo_l")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--workers", type=int, default=None, help="кількість процесів з моделлю")
+    parser.add_argument("--report", help="зберегти звіт у JSON")
+    args = parser.parse_args()
+
+    items = collect_directory(args.root)
+    store = EmbeddingStore(model_name=args.model)
+    recognizer = FaceRecognizer()
+
+    start = time.perf_counter()
+    results = bulk_enroll(items, recognizer, store, model_name=args.model, device=args.device, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+        if not result.ok:
+            print(f"[WARN] {result.path}: {result.status} {result.detail}")
+    print(f"[OK] {len(results)} фото, {len(recognizer)} користувачів за {elapsed:.1f} с: {counts}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump([r.to_dict() for r in results], f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
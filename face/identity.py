@@ -0,0 +1,70 @@
+import time
+from collections import deque
+
+
+class IdentityVotes:
+    """
+    Історія розпізнавань одного треку обличчя.
+
+    Особа підтверджується, коли останні confirm_frames розпізнавань збігаються; так само
+    (confirm_frames поспіль інших результатів) вона змінюється або скидається. Окремі промахи
+    розпізнавання не змінюють підпису, тож він не "мерехтить".
+    """
+
+    def __init__(self, confirm_frames=3, history=8):
+        self.confirm_frames = confirm_frames
+        self.history = deque(maxlen=max(history, confirm_frames))  # (user_id | None, score)
+        self.user_id = None       # підтверджена особа
+        self.verified_at = None   # коли підтверджену особу востаннє бачили в розпізнаванні
+
+    def observe(self, user_id, score, now):
+        """
+        Додає результат розпізнавання. Повертає підтверджену особу (або None)
+        """
+        self.history.append((user_id, score))
+        recent = [uid for uid, _ in list(self.history)[-self.confirm_frames:]]
+
+        if len(recent) == self.confirm_frames and all(uid == user_id for uid in recent):
+            self.user_id = user_id
+            self.verified_at = now if user_id is not None else None
+        elif user_id is not None and user_id == self.user_id:
+            self.verified_at = now
+        return self.user_id
+
+
+class IdentityCache:
+    """
+    Ідентичності треків облич з TTL.
+
+    Поки особа треку підтверджена й перевірялась не раніше ніж ttl секунд тому, повторне
+    розпізнавання (embedding + пошук) для нього не потрібне. Непідтверджені треки
+    розпізнаються на кожному ключовому кадрі, доки не наберуть confirm_frames голосів.
+    """
+
+    def __init__(self, confirm_frames=3, history=8, ttl=5.0, clock=time.monotonic):
+        self.confirm_frames = confirm_frames
+        self.history = history
+        self.ttl = ttl
+        self.clock = clock
+        self._votes = {}  # track_id -> IdentityVotes
+
+    def _get(self, track_id):
+        votes = self._votes.get(track_id)
+        if votes is None:
+            votes = IdentityVotes(self.confirm_frames, self.history)
+            self._votes[track_id] = votes
+        return votes
+
+    def observe(self, track_id, user_id, score):
+        return self._get(track_id).observe(user_id, score, self.clock())
+
+    def needs_recognition(self, track_id):
+        votes = self._votes.get(track_id)
+        if votes is None or votes.user_id is None or votes.verified_at is None:
+            return True
+        return self.clock() - votes.verified_at >= self.ttl
+
+    def prune(self, alive_track_ids):
+        alive = set(alive_track_ids)
+        for track_id in [t for t in self._votes if t not in alive]:
+            del self._votes[track_id]
@@ -0,0 +1,165 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+def _top_k(sims, k):
+    """
+    Індекси та значення k найбільших елементів кожного рядка sims (M, N), відсортовані за спаданням
+    """
+    k = min(k, sims.shape[1])
+    if k == 1:
+        top = np.argmax(sims, axis=1)[:, None]
+    else:
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(sims, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+    return np.take_along_axis(sims, top, axis=1), top
+
+
+class EmbeddingIndex(ABC):
+    """
+    Інтерфейс індексу нормалізованих embeddings для FaceRecognizer.
+
+    Рядки адресуються цілими номерами 0..N-1 (рядок = користувач), вектори вже L2-нормалізовані.
+    search повертає (scores (M, k), rows (M, k)); якщо кандидатів менше за k, зайві рядки = -1, scores = -inf.
+    """
+
+    def __init__(self, dim=512, initial_capacity=64):
+        self.dim = dim
+        self.size = 0
+        self._matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+
+    def __len__(self):
+        return self.size
+
+    def upsert(self, row, vector):
+        if row >= self._matrix.shape[0]:
+            grown = np.zeros((max(row + 1, self._matrix.shape[0] * 2), self.dim), dtype=np.float32)
+            grown[:self.size] = self._matrix[:self.size]
+            self._matrix = grown
+        self._matrix[row] = vector
+        self.size = max(self.size, row + 1)
+
+    @property
+    def vectors(self):
+        return self._matrix[:self.size]
+
+    @abstractmethod
+    def search(self, queries, k=1):
+        pass
+
+    def _exact_search(self, queries, k):
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        if self.size:
+            top_scores, top = _top_k(queries @ self.vectors.T, k)
+            n = top.shape[1]
+            scores[:, :n] = top_scores
+            rows[:, :n] = top
+        return scores, rows
+
+
+class ExactIndex(EmbeddingIndex):
+    """
+    Точний пошук: одне матричне множення по всій галереї. Оптимальний до ~10-20 тис. людей.
+    """
+
+    def search(self, queries, k=1):
+        return self._exact_search(queries, k)
+
+
+class IVFIndex(EmbeddingIndex):
+    """
+    Наближений пошук Inverted File: галерея ділиться сферичним k-means на nlist кластерів,
+    запит порівнюється лише з рядками nprobe найближчих кластерів.
+
+    nprobe — головний регулятор recall/latency: більше кластерів = точніше, але повільніше.
+    Поки галерея менша за train_min, працює як точний пошук. Центроїди перенавчаються,
+    коли галерея виросла у retrain_growth разів від моменту останнього навчання.
+    """
+
+    def __init__(self, dim=512, nlist=None, nprobe=8, train_min=2000, retrain_growth=2.0,
+                 kmeans_iters=10, max_train_samples=50000, seed=0):
+        super().__init__(dim=dim)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.retrain_growth = retrain_growth
+        self.kmeans_iters = kmeans_iters
+        self.max_train_samples = max_train_samples
+        self._rng = np.random.default_rng(seed)
+
+        self.centroids = None
+        self._trained_size = 0
+        self._assign = np.zeros(0, dtype=np.int32)   # рядок -> кластер
+        self._lists = []                             # кластер -> np.ndarray рядків
+        self._dirty = False
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def upsert(self, row, vector):
+        super().upsert(row, vector)
+        if self.size >= self.train_min and (
+                not self.is_trained or self.size >= self._trained_size * self.retrain_growth):
+            self.train()
+        elif self.is_trained:
+            if row >= len(self._assign):
+                grown = np.zeros(max(row + 1, len(self._assign) * 2), dtype=np.int32)
+                grown[:len(self._assign)] = self._assign
+                self._assign = grown
+            self._assign[row] = int(np.argmax(self.centroids @ vector))
+            self._dirty = True
+
+    def train(self):
+        vectors = self.vectors
+        nlist = self.nlist or max(1, int(np.sqrt(self.size)))
+        sample = vectors
+        if len(vectors) > self.max_train_samples:
+            sample = vectors[self._rng.choice(len(vectors), self.max_train_samples, replace=False)]
+
+        centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] < 1e-12
+            # Порожні кластери переносимо на випадкові точки
+            sums[empty] = sample[self._rng.choice(len(sample), int(empty.sum()))]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        self.centroids = centroids.astype(np.float32)
+        self._assign = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+        self._trained_size = self.size
+        self._dirty = True
+
+    def _rebuild_lists(self):
+        assign = self._assign[:self.size]
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        self._dirty = False
+
+    def search(self, queries, k=1):
+        if not self.is_trained:
+            return self._exact_search(queries, k)
+        if self._dirty:
+            self._rebuild_lists()
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        _, probes = _top_k(queries @ self.centroids.T, nprobe)
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        for q, query in enumerate(queries):
+            candidates = np.concatenate([self._lists[p] for p in probes[q]])
+            if not len(candidates):
+                continue
+            sims = self.vectors[candidates] @ query
+            top_scores, top = _top_k(sims[None, :], k)
+            n = top.shape[1]
+            scores[q, :n] = top_scores[0]
+            rows[q, :n] = candidates[top[0]]
+        return scores, rows
@@ -0,0 +1,95 @@
+import threading
+import cv2
+import numpy as np
+from insightface.app import FaceAnalysis
+from insightface.app.common import Face
+from insightface.utils import face_align
+
+# Лише моделі, які ми справді використовуємо: landmarks 2D/3D та вік/стать з набору не завантажуються
+DEFAULT_MODULES = ("detection", "recognition")
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_providers(device):
+    # Порядок провайдерів для onnxruntime
+    if device == "cuda":
+        return ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    return ["CPUExecutionProvider"]
+
+
+def get_ctx_id(device):
+    # -1 означає CPU, 0 - GPU
+    return 0 if device == "cuda" else -1
+
+
+class FaceModels:
+    """
+    Один набір ONNX-сесій InsightFace, розкладений на окремі стадії:
+    detect (рамки + 5 опорних точок) -> align (norm_crop 112x112) -> embed (ArcFace, один батч на кадр).
+    """
+
+    def __init__(self, model_name="buffalo_l", device="cpu", modules=DEFAULT_MODULES):
+        self.model_name = model_name
+        self.device = device
+        self.app = FaceAnalysis(name=model_name, allowed_modules=list(modules), providers=get_providers(device))
+        self.app.prepare(ctx_id=get_ctx_id(device))
+        self.detector = self.app.det_model
+        self.recognition = self.app.models.get("recognition")
+        self._batched = True  # деякі експорти ArcFace мають фіксований batch=1
+
+    def detect(self, frame_bgr, det_size=None, scale=1.0):
+        """
+        Список Face (bbox, kps, det_score) у координатах повного кадру.
+
+        det_size: розмір входу детектора (w, h), кратний 32; None — як у prepare()
+        scale: кадр зменшується перед детекцією, рамки й точки масштабуються назад
+        """
+        image = frame_bgr
+        if scale != 1.0:
+            image = cv2.resize(frame_bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        bboxes, kpss = self.detector.detect(image, input_size=det_size, max_num=0, metric="default")
+        faces = []
+        for i in range(bboxes.shape[0]):
+            faces.append(Face(
+                bbox=bboxes[i, :4] / scale,
+                kps=kpss[i] / scale if kpss is not None else None,
+                det_score=bboxes[i, 4],
+            ))
+        return faces
+
+    def align(self, frame_bgr, faces):
+        """
+        Вирівняні кропи облич із повнороздільного кадру за 5 опорними точками
+        """
+        size = self.recognition.input_size[0]
+        return [face_align.norm_crop(frame_bgr, landmark=face.kps, image_size=size) for face in faces]
+
+    def embed(self, crops):
+        """
+        ArcFace для всіх кропів одним викликом сесії. Повертає (N, 512) float32
+        """
+        if not crops:
+            return np.zeros((0, 512), dtype=np.float32)
+        if self._batched:
+            try:
+                return np.asarray(self.recognition.get_feat(list(crops)), dtype=np.float32)
+            except Exception:
+                self._batched = False
+                print(f"[WARN] {self.model_name}: модель розпізнавання не підтримує батчі, рахую по одному")
+        return np.concatenate([self.recognition.get_feat(crop) for crop in crops]).astype(np.float32)
+
+
+def get_face_models(model_name="buffalo_l", device="cpu", modules=DEFAULT_MODULES):
+    """
+    Спільний на процес набір моделей: детектор, трекер і enrollment ділять одні ONNX-сесії
+    """
+    key = (model_name, device, tuple(modules))
+    with _registry_lock:
+        models = _registry.get(key)
+        if models is None:
+            models = FaceModels(model_name, device, modules)
+            _registry[key] = models
+        return models
@@ -1,39 +1,97 @@
+import threading
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from .index import ExactIndex
+
+
+def l2_normalize(vectors):
+    """
+    Нормалізує вектори (N, D) або (D,) до одиничної довжини у float32
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
 
 class FaceRecognizer:
-    def __init__(self, threshold=0.4):
+    def __init__(self, threshold=0.4, dim=512, index=None):
         """
         threshold: максимальна відстань для визнання обличчя знайомим
+        index: бекенд пошуку (face.index.ExactIndex за замовчуванням, IVFIndex для великих галерей)
+
+        Галерея зберігається як L2-нормалізовані float32 прототипи (один рядок на користувача),
+        тому пошук — це матричне множення без перебудови списків.
+        Кілька фото одного користувача усереднюються в один прототип.
         """
         self.threshold = threshold
-        self.embeddings = []  # список np.ndarray (512,)
-        self.user_ids = []    # список імен користувачів
+        self.dim = dim
+        self.index = index if index is not None else ExactIndex(dim=dim)
+        self.user_ids = []   # рядок індексу -> user_id
+        self._rows = {}      # user_id -> рядок індексу
+        self._sums = {}      # user_id -> сума нормалізованих embeddings (для прототипу)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @property
+    def min_similarity(self):
+        return 1 - self.threshold
 
     def add_user(self, user_id: str, embedding: np.ndarray):
         """
-        Додати нового користувача в базу
+        Додати нового користувача в базу або ще одне фото до вже існуючого
         """
-        self.user_ids.append(user_id)
-        self.embeddings.append(embedding)
+        vector = l2_normalize(embedding).reshape(-1)
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                row = len(self.user_ids)
+                self._rows[user_id] = row
+                self.user_ids.append(user_id)
+                self._sums[user_id] = np.zeros(self.dim, dtype=np.float32)
 
-    def recognize(self, embedding: np.ndarray):
+            self._sums[user_id] += vector
+            self.index.upsert(row, l2_normalize(self._sums[user_id]))
+
+    def search(self, embeddings, k=1):
         """
-        Порівняти embedding з базою, повернути user_id або None
+        Пошук top-k для кількох облич одним запитом до індексу.
+
+        Повертає (scores, user_ids): масив косинусних схожостей (M, k) та список із M списків user_id.
         """
-        if not self.embeddings:
-            return None
+        queries = l2_normalize(np.atleast_2d(embeddings))
+        with self._lock:
+            scores, rows = self.index.search(queries, k=k)
+            user_ids = [[self.user_ids[r] for r in row if r >= 0] for row in rows]
+        return scores, user_ids
 
-        embeddings_matrix = np.vstack(self.embeddings)  # (N, 512)
-        embedding = embedding.reshape(1, -1)
+    def recognize_topk(self, embedding: np.ndarray, k=5):
+        """
+        Повертає до k кандидатів [(user_id, схожість), ...] у порядку спадання схожості
+        """
+        scores, user_ids = self.search(embedding, k=k)
+        return [(user_id, float(score)) for user_id, score in zip(user_ids[0], scores[0])]
 
-        # Косінусна схожість
-        sims = cosine_similarity(embedding, embeddings_matrix)[0]
-        best_idx = np.argmax(sims)
-        best_sim = sims[best_idx]
+    def recognize_batch(self, embeddings):
+        """
+        Розпізнає всі обличчя кадру разом. Повертає список user_id або None для кожного обличчя
+        """
+        return [user_id for user_id, _ in self.recognize_batch_scored(embeddings)]
 
-        # Якщо схожість нижче threshold, користувач не знайдений
-        if best_sim < (1 - self.threshold):
-            return None
+    def recognize_batch_scored(self, embeddings):
+        """
+        Як recognize_batch, але з косинусною схожістю найкращого кандидата: [(user_id | None, score), ...]
+        """
+        if len(embeddings) == 0:
+            return []
+        scores, user_ids = self.search(np.vstack(embeddings), k=1)
+        return [
+            (ids[0] if ids and score[0] >= self.min_similarity else None, float(score[0]) if ids else 0.0)
+            for score, ids in zip(scores, user_ids)
+        ]
 
-        return self.user_ids[best_idx]
+    def recognize(self, embedding: np.ndarray):
+        """
+        Порівняти embedding з базою, повернути user_id або None
+        """
+        return self.recognize_batch([embedding])[0]
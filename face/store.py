@@ -0,0 +1,92 @@
+import hashlib
+import os
+import time
+import numpy as np
+from utils.database import DB_PATH, db_lock, get_connection
+
+
+def file_hash(path, chunk_size=1 << 20):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Постійний кеш face embeddings у таблиці face_embeddings бази assistant.db.
+
+    Ключ — (шлях до фото, назва моделі); разом із embedding зберігаються хеш вмісту, mtime та розмір файлу.
+    Якщо mtime і розмір не змінились, файл навіть не читається; якщо змінились — перевіряється хеш,
+    і лише нові або змінені фото проганяються через InsightFace.
+    Фото без обличчя теж запам'ятовуються (embedding = NULL), щоб не обробляти їх при кожному старті.
+    """
+
+    def __init__(self, model_name, db_path=DB_PATH):
+        self.model_name = model_name
+        self.conn = get_connection(db_path)
+        with db_lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS face_embeddings (
+                    path TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    mtime REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    embedding BLOB,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (path, model)
+                )
+            ''')
+            self.conn.commit()
+
+    def lookup(self, path):
+        """
+        Повертає (знайдено, embedding або None). Знайдено = кеш актуальний для поточного вмісту файлу
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False, None
+
+        with db_lock:
+            row = self.conn.execute(
+                "SELECT content_hash, mtime, size, embedding FROM face_embeddings WHERE path = ? AND model = ?",
+                (path, self.model_name)
+            ).fetchone()
+        if row is None:
+            return False, None
+
+        content_hash, mtime, size, blob = row
+        if mtime != stat.st_mtime or size != stat.st_size:
+            if file_hash(path) != content_hash:
+                return False, None
+            # Вміст той самий (наприклад, файл скопіювали) — лише оновлюємо метадані
+            with db_lock:
+                self.conn.execute(
+                    "UPDATE face_embeddings SET mtime = ?, size = ? WHERE path = ? AND model = ?",
+                    (stat.st_mtime, stat.st_size, path, self.model_name)
+                )
+                self.conn.commit()
+
+        return True, self._decode(blob)
+
+    def save(self, path, user_id, embedding):
+        stat = os.stat(path)
+        blob = None if embedding is None else np.asarray(embedding, dtype=np.float32).tobytes()
+        with db_lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO face_embeddings "
+                "(path, model, user_id, content_hash, mtime, size, embedding, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, self.model_name, user_id, file_hash(path), stat.st_mtime, stat.st_size, blob, time.time())
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def _decode(blob):
+        if blob is None:
+            return None
+        return np.frombuffer(blob, dtype=np.float32)
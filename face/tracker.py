@@ -0,0 +1,240 @@
+import cv2
+import numpy as np
+from core.timing import stage
+from face.identity import IdentityCache
+
+
+def bbox_iou(a, b):
+    """
+    IoU двох рамок [x1, y1, x2, y2]
+    """
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    if inter <= 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+class FaceTrack:
+    """
+    Один відстежуваний користувач: рамка, швидкість, опорні точки для optical flow та user_id.
+    """
+
+    def __init__(self, track_id, bbox, embedding, user_id):
+        self.track_id = track_id
+        self.bbox = np.asarray(bbox, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # зсув рамки за кадр
+        self.embedding = embedding
+        self.user_id = user_id
+        self.points = None   # точки у зменшеному сірому кадрі
+        self.misses = 0      # скільки ключових кадрів поспіль детектор не бачив трек
+        self.lost = False
+
+    def to_dict(self):
+        return {
+            "track_id": self.track_id,
+            "bbox": self.bbox.astype(int).tolist(),
+            "user_id": self.user_id,
+            "embedding": self.embedding,
+        }
+
+
+class FaceTracker:
+    """
+    Трекінг облич між ключовими кадрами.
+
+    Детекцію (FaceEmbedder.detect) запускаємо лише кожні keyframe_interval кадрів або коли трек
+    загубився. Між ключовими кадрами рамки переносяться дешевим Lucas-Kanade optical flow,
+    а user_id їде разом із треком. Найдорожчий крок — ArcFace embedding — на ключовому кадрі
+    рахується одним батчем лише для нових і ще не впізнаних облич.
+    """
+
+    def __init__(self, embedder, recognizer, keyframe_interval=10, iou_threshold=0.3,
+                 max_misses=1, flow_scale=0.5, min_flow_points=6, identities=None):
+        """
+        identities: face.identity.IdentityCache — голосування за особу треку і TTL повторної перевірки
+        """
+        self.embedder = embedder
+        self.recognizer = recognizer
+        self.keyframe_interval = keyframe_interval
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.flow_scale = flow_scale
+        self.min_flow_points = min_flow_points
+        self.identities = identities or IdentityCache()
+        # Параметри детекції для FaceEmbedder.get_embeddings (det_size, scale, light); змінює face.adaptive
+        self.detect_options = {}
+
+        self.tracks = []
+        self.frame_index = 0
+        self._next_id = 0
+        self._frames_since_keyframe = 0
+        self._force_keyframe = True
+        self._prev_gray = None
+
+    def reset(self):
+        self.tracks = []
+        self.identities.prune([])
+        self._prev_gray = None
+        self._force_keyframe = True
+
+    def update(self, frame_bgr):
+        """
+        Обробляє кадр і повертає список треків:
+        [{"track_id": int, "bbox": [x1, y1, x2, y2], "user_id": str | None, "embedding": np.ndarray}, ...]
+        """
+        with stage("track"):
+            gray = self._prepare_gray(frame_bgr)
+
+        if self._is_keyframe():
+            self._keyframe_update(frame_bgr, gray)
+        else:
+            with stage("track"):
+                self._propagate(gray)
+
+        self._prev_gray = gray
+        self.frame_index += 1
+        return [track.to_dict() for track in self.tracks]
+
+    def _is_keyframe(self):
+        return (
+            self._force_keyframe
+            or self._prev_gray is None
+            or self._frames_since_keyframe >= self.keyframe_interval
+        )
+
+    def _prepare_gray(self, frame_bgr):
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        if self.flow_scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.flow_scale, fy=self.flow_scale, interpolation=cv2.INTER_AREA)
+        return gray
+
+    # --- Ключовий кадр: детекція + embedding + зіставлення з треками ---
+    def _keyframe_update(self, frame_bgr, gray):
+        with stage("face"):
+            faces = self.embedder.detect(frame_bgr, **self.detect_options)
+        matches = self._match(faces)
+        matched_dets = {det_idx: track for det_idx, track in matches}
+
+        # Embedding потрібен лише новим обличчям і трекам без підтвердженої особи;
+        # підтверджені треки перевіряються лише після закінчення TTL у кеші ідентичностей
+        to_embed = [
+            det_idx for det_idx in range(len(faces))
+            if det_idx not in matched_dets or self._needs_embedding(matched_dets[det_idx])
+        ]
+        with stage("embed"):
+            embeddings = self.embedder.embed_faces(frame_bgr, [faces[i] for i in to_embed])
+        # Усі обличчя кадру розпізнаються одним матричним множенням
+        with stage("recognize"):
+            results = self.recognizer.recognize_batch_scored(embeddings)
+        identified = {det_idx: (embeddings[i], results[i]) for i, det_idx in enumerate(to_embed)}
+
+        matched_tracks = set()
+        for det_idx, track in matches:
+            new_bbox = np.asarray(faces[det_idx].bbox, dtype=np.float32)
+            if track.lost:
+                track.velocity = np.zeros(4, dtype=np.float32)
+            track.bbox = new_bbox
+            if det_idx in identified:
+                track.embedding, (user_id, score) = identified[det_idx]
+                track.user_id = self.identities.observe(track.track_id, user_id, score)
+            track.misses = 0
+            track.lost = False
+            matched_tracks.add(track.track_id)
+
+        for det_idx, face in enumerate(faces):
+            if det_idx in matched_dets:
+                continue
+            embedding, (user_id, score) = identified[det_idx]
+            # Нове обличчя показується як невідоме, доки особа не підтвердиться кількома розпізнаваннями
+            track = FaceTrack(self._next_id, face.bbox, embedding, None)
+            track.user_id = self.identities.observe(track.track_id, user_id, score)
+            self._next_id += 1
+            self.tracks.append(track)
+            matched_tracks.add(track.track_id)
+
+        for track in self.tracks:
+            if track.track_id not in matched_tracks:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        self.identities.prune(t.track_id for t in self.tracks)
+
+        for track in self.tracks:
+            track.points = self._select_points(gray, track.bbox)
+
+        self._frames_since_keyframe = 0
+        self._force_keyframe = False
+
+    def _needs_embedding(self, track):
+        # Трек, що загубився між ключовими кадрами, міг "перескочити" на інше обличчя
+        return track.lost or self.identities.needs_recognition(track.track_id)
+
+    def _match(self, faces):
+        """
+        Жадібне зіставлення детекцій із треками за IoU (облич у кадрі мало, тож цього досить)
+        """
+        candidates = []
+        for det_idx, face in enumerate(faces):
+            for track in self.tracks:
+                iou = bbox_iou(face.bbox, track.bbox)
+                if iou >= self.iou_threshold:
+                    candidates.append((iou, det_idx, track))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+
+        used_dets, used_tracks, matches = set(), set(), []
+        for _, det_idx, track in candidates:
+            if det_idx in used_dets or track.track_id in used_tracks:
+                continue
+            used_dets.add(det_idx)
+            used_tracks.add(track.track_id)
+            matches.append((det_idx, track))
+        return matches
+
+    # --- Проміжний кадр: перенесення рамок optical flow ---
+    def _propagate(self, gray):
+        self._frames_since_keyframe += 1
+        for track in self.tracks:
+            shift = self._flow_shift(gray, track)
+            if shift is None:
+                # Flow не спрацював: рухаємо за останньою швидкістю і просимо ключовий кадр
+                track.bbox = track.bbox + track.velocity
+                track.lost = True
+                self._force_keyframe = True
+            else:
+                dx, dy = shift
+                track.velocity = np.array([dx, dy, dx, dy], dtype=np.float32)
+                track.bbox = track.bbox + track.velocity
+
+    def _select_points(self, gray, bbox):
+        x1, y1, x2, y2 = (bbox * self.flow_scale).astype(int)
+        h, w = gray.shape[:2]
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(w, x2), min(h, y2)
+        if x2 - x1 < 4 or y2 - y1 < 4:
+            return None
+
+        mask = np.zeros_like(gray)
+        mask[y1:y2, x1:x2] = 255
+        points = cv2.goodFeaturesToTrack(gray, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask)
+        return points
+
+    def _flow_shift(self, gray, track):
+        if track.points is None or len(track.points) < self.min_flow_points:
+            return None
+
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, track.points, None,
+                                                          winSize=(15, 15), maxLevel=2)
+        if next_points is None:
+            return None
+
+        good = status.reshape(-1) == 1
+        if good.sum() < self.min_flow_points:
+            return None
+
+        # Медіана стійка до окремих точок, що "з'їхали" на фон
+        delta = np.median(next_points[good] - track.points[good], axis=0).reshape(-1)
+        track.points = next_points[good].reshape(-1, 1, 2)
+        return delta / self.flow_scale
@@ -0,0 +1,95 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+from gestures.features import classify_static
+
+DEFAULT_MODEL_PATH = "models/gestures.onnx"
+NO_GESTURE = "none"  # клас "без жесту" у навченій моделі
+
+
+def normalize_landmarks(landmarks):
+    """
+    (hands, 21, 3) у пікселях -> (hands, 63) float32, інваріантні до положення й розміру руки:
+    початок координат у зап'ясті, масштаб — найбільша відстань від зап'ястя.
+    Ту саму функцію використовують і тренування, і інференс.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    centered = landmarks - landmarks[:, :1, :]
+    scale = np.linalg.norm(centered[:, :, :2], axis=2).max(axis=1)
+    centered /= np.maximum(scale, 1e-6)[:, None, None]
+    return centered.reshape(len(landmarks), -1)
+
+
+class GestureClassifier(ABC):
+    """
+    Інтерфейс класифікатора статичних жестів: приймає всі руки кадру одним масивом
+    (hands, 21, 3) у пікселях і повертає список назв жестів або None.
+    """
+
+    @abstractmethod
+    def classify(self, landmarks):
+        pass
+
+
+class RuleGestureClassifier(GestureClassifier):
+    """
+    Ручні правила (thumbs_up, victory) — запасний варіант, коли навченої моделі немає
+    """
+
+    def classify(self, landmarks):
+        return classify_static(landmarks)
+
+
+class OnnxGestureClassifier(GestureClassifier):
+    """
+    Навчена модель (MLP над нормалізованими landmarks), експортована в ONNX.
+    Всі руки кадру проходять через onnxruntime одним батчем, тому вартість не залежить від кількості жестів.
+
+    Назви класів читаються з файлу <model>.labels.json поруч із моделлю.
+    """
+
+    def __init__(self, model_path, min_confidence=0.8, providers=None):
+        import onnxruntime as ort
+
+        self.session = ort.InferenceSession(model_path, providers=providers or ["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.min_confidence = min_confidence
+        with open(labels_path(model_path), encoding="utf-8") as f:
+            self.labels = json.load(f)
+
+    def predict_proba(self, landmarks):
+        features = normalize_landmarks(landmarks)
+        logits = self.session.run(None, {self.input_name: features})[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def classify(self, landmarks):
+        if len(landmarks) == 0:
+            return []
+        probs = self.predict_proba(landmarks)
+        best = probs.argmax(axis=1)
+        confidence = probs[np.arange(len(best)), best]
+        return [
+            self.labels[b] if c >= self.min_confidence and self.labels[b] != NO_GESTURE else None
+            for b, c in zip(best, confidence)
+        ]
+
+
+def labels_path(model_path):
+    return os.path.splitext(model_path)[0] + ".labels.json"
+
+
+def load_classifier(model_path=DEFAULT_MODEL_PATH, min_confidence=0.8):
+    """
+    ONNX-модель, якщо вона є на диску, інакше — ручні правила
+    """
+    if model_path and os.path.exists(model_path) and os.path.exists(labels_path(model_path)):
+        try:
+            classifier = OnnxGestureClassifier(model_path, min_confidence=min_confidence)
+            print(f"[INFO] Модель жестів: {model_path} ({len(classifier.labels)} класів)")
+            return classifier
+        except Exception as e:
+            print(f"[WARN] Не вдалося завантажити {model_path}: {e}. Використовую правила")
+    return RuleGestureClassifier()
@@ -0,0 +1,103 @@
+"""
+Формат датасету жестів: один .npz файл із масивами
+    landmarks   — (N, 21, 3) float32, landmarks руки MediaPipe у пікселях кадру
+    labels      — (N,) int64, індекс класу
+    label_names — (C,) str, назви класів; клас "none" означає "без жесту"
+
+Запис нових прикладів з вебкамери:
+    python -m gestures.dataset data/gestures.npz --labels none thumbs_up victory ok stop
+Цифра 0-9 вибирає клас, пробіл вмикає/вимикає запис, Esc — зберегти й вийти.
+"""
+import argparse
+import os
+import numpy as np
+
+
+def load_dataset(path):
+    data = np.load(path, allow_pickle=False)
+    return data["landmarks"].astype(np.float32), data["labels"].astype(np.int64), [str(n) for n in data["label_names"]]
+
+
+def save_dataset(path, landmarks, labels, label_names):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(
+        path,
+        landmarks=np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3),
+        labels=np.asarray(labels, dtype=np.int64),
+        label_names=np.asarray(label_names),
+    )
+
+
+def append_samples(path, landmarks, label_names_of_samples):
+    """
+    Додає приклади до датасету, розширюючи список класів за потреби
+    """
+    if os.path.exists(path):
+        old_landmarks, old_labels, names = load_dataset(path)
+    else:
+        old_landmarks, old_labels, names = np.zeros((0, 21, 3), np.float32), np.zeros(0, np.int64), []
+
+    for name in label_names_of_samples:
+        if name not in names:
+            names.append(name)
+    new_labels = np.array([names.index(n) for n in label_names_of_samples], dtype=np.int64)
+
+    save_dataset(
+        path,
+        np.concatenate([old_landmarks, np.asarray(landmarks, np.float32).reshape(-1, 21, 3)]),
+        np.concatenate([old_labels, new_labels]),
+        names,
+    )
+
+
+def record(path, labels, source=0):
+    import cv2
+    from gestures.predictor import GesturePredictor
+    from utils.overlay import OverlayBuffer, Compositor
+
+    cap = cv2.VideoCapture(source)
+    predictor = GesturePredictor()
+    compositor = Compositor()
+    current, recording = 0, False
+    samples, names = [], []
+
+    while True:
+        ret, frame = cap.read()
+        if not ret: break
+
+        overlay = OverlayBuffer()
+        hands = predictor.predict_gestures(frame, overlay)
+        if recording:
+            for hand in hands:
+                samples.append(hand["landmarks"])
+                names.append(labels[current])
+
+        status = f"{labels[current]} {'REC' if recording else ''} ({len(samples)})"
+        overlay.label(status, (20, 40), (0, 0, 255) if recording else (255, 255, 0))
+        cv2.imshow("Gesture dataset", compositor.render(frame, overlay, copy=False))
+
+        key = cv2.waitKey(1) & 0xFF
+        if key == 27: break
+        if key == ord(" "):
+            recording = not recording
+        elif ord("0") <= key <= ord("9") and key - ord("0") < len(labels):
+            current = key - ord("0")
+
+    cap.release()
+    cv2.destroyAllWindows()
+    if samples:
+        append_samples(path, np.stack(samples), names)
+        print(f"[OK] Додано {len(samples)} прикладів у {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запис прикладів жестів з вебкамери")
+    parser.add_argument("path", help="файл датасету .npz (буде доповнено)")
+    parser.add_argument("--labels", nargs="+", required=True, help="назви класів, клавіші 0-9")
+    parser.add_argument("--source", type=int, default=0)
+    args = parser.parse_args()
+    record(args.path, args.labels, args.source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+
+# Індекси landmarks MediaPipe Hands
+WRIST = 0
+THUMB_IP, THUMB_TIP = 3, 4
+FINGER_TIPS = np.array([8, 12, 16, 20])   # вказівний, середній, безіменний, мізинець
+FINGER_PIPS = np.array([6, 10, 14, 18])   # суглоби, з якими порівнюємо кінчики
+
+
+def landmarks_to_array(multi_hand_landmarks):
+    """
+    Результат MediaPipe -> масив (hands, 21, 3) float32 у нормалізованих координатах [0..1]
+    """
+    if not multi_hand_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32)
+    return np.array(
+        [[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in multi_hand_landmarks],
+        dtype=np.float32,
+    )
+
+
+def handedness_labels(multi_handedness):
+    """
+    "Left"/"Right" для кожної руки. MediaPipe вважає вхід дзеркальним, тож мітка збігається з боком,
+    з якого рука видна на зображенні відносно тіла, і для дзеркального, і для звичайного кадру
+    """
+    if not multi_handedness:
+        return []
+    return [hand.classification[0].label for hand in multi_handedness]
+
+
+def to_pixels(landmarks, width, height):
+    """
+    Нормалізовані координати -> пікселі кадру (z масштабується як x, так само як у MediaPipe)
+    """
+    return landmarks * np.array([width, height, width], dtype=np.float32)
+
+
+def finger_states(landmarks):
+    """
+    Для кожної руки й кожного з 4 пальців (без великого): (up, down) — булеві масиви (hands, 4).
+    В координатах MediaPipe Y зменшується при русі вгору.
+    """
+    tips_y = landmarks[:, FINGER_TIPS, 1]
+    pips_y = landmarks[:, FINGER_PIPS, 1]
+    return tips_y < pips_y, tips_y > pips_y
+
+
+def open_hands(landmarks):
+    """
+    Долоня відкрита, якщо піднято щонайменше 3 пальці з 4. Повертає (hands,)
+    """
+    up, _ = finger_states(landmarks)
+    return up.sum(axis=1) >= 3
+
+
+def hand_bboxes(landmarks):
+    """
+    Рамки [x1, y1, x2, y2] для всіх рук: (hands, 4) int
+    """
+    mins = landmarks[:, :, :2].min(axis=1)
+    maxs = landmarks[:, :, :2].max(axis=1)
+    return np.concatenate([mins, maxs], axis=1).astype(int)
+
+
+def classify_static(landmarks):
+    """
+    Правила статичних жестів для всіх рук одразу. Повертає список назв жестів або None
+    """
+    up, down = finger_states(landmarks)
+    y = landmarks[:, :, 1]
+
+    # 1. 👍 thumbs_up: великий палець вгору, решта зігнуті
+    thumbs_up = (y[:, THUMB_TIP] < y[:, THUMB_IP]) & (y[:, THUMB_IP] < y[:, WRIST]) & down.all(axis=1)
+    # 2. ✌️ victory: вказівний та середній вгорі, безіменний та мізинець зігнуті
+    victory = up[:, 0] & up[:, 1] & down[:, 2] & down[:, 3]
+
+    names = np.select([thumbs_up, victory], ["thumbs_up", "victory"], default="")
+    return [name or None for name in names.tolist()]
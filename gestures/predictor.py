@@ -1,156 +1,170 @@
 import cv2
 import mediapipe as mp
 import numpy as np
+from core.timing import stage
+from gestures.trajectory import HandTrajectoryStore
+from gestures.classifier import load_classifier
+from gestures.features import hand_bboxes, handedness_labels, landmarks_to_array, open_hands, to_pixels
 
 mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
+
+
+def merge_regions(regions):
+    """
+    Об'єднує рамки, що перетинаються (сусідні обличчя), щоб одна рука не оброблялась двічі
+    """
+    merged = [list(map(int, r)) for r in regions]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    merged[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
 
 class GesturePredictor:
-    def __init__(self):
-        self.hands = mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-        self.history = {}  # Історія позицій (wrist_x, wrist_y) для кожної руки (key — індекс руки)
+    def __init__(self, classifier=None):
+        """
+        classifier: класифікатор статичних жестів (gestures.classifier); за замовчуванням — ONNX-модель
+        з models/gestures.onnx, якщо вона є, інакше ручні правила
+        """
+        self.classifier = classifier or load_classifier()
+        # Один екземпляр на процес, стан — окремо для кожної камери (stream_id).
+        # Граф MediaPipe у режимі трекінгу тримає стан попереднього кадру, тому кожен потік має свій граф;
+        # самі tflite-моделі mmap-ляться, тож додатковий граф коштує мало.
+        self._hands = {}
+        self.trajectories = {}  # stream_id -> HandTrajectoryStore (траєкторії зап'ясть зі стабільними id рук)
         self.max_history_len = 15
+        self._roi_hands = {}  # stream_id -> граф MediaPipe для ROI-режиму
+        self.roi_size = 256   # довша сторона кропу перед інференсом
+
+    def _get_hands(self, stream_id):
+        hands = self._hands.get(stream_id)
+        if hands is None:
+            hands = mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.7
+            )
+            self._hands[stream_id] = hands
+        return hands
+
+    def _get_roi_hands(self, stream_id):
+        # Кропи змінюються від кадру до кадру (і їх може бути кілька), тож трекінг MediaPipe між ними
+        # не має сенсу: у ROI-режимі граф працює в static-режимі, але на невеликих зображеннях
+        hands = self._roi_hands.get(stream_id)
+        if hands is None:
+            hands = mp_hands.Hands(
+                static_image_mode=True,
+                max_num_hands=2,
+                min_detection_confidence=0.7
+            )
+            self._roi_hands[stream_id] = hands
+        return hands
 
-    def predict_gestures(self, frame):
+    def predict_gestures(self, frame, overlay=None, stream_id=0, regions=None):
+        """
+        Кадр не змінюється: скелет руки лише додається в overlay (utils.overlay.OverlayBuffer), якщо його передали.
+
+        regions: None — руки шукаються на всьому кадрі; список рамок [x1, y1, x2, y2] — лише в цих
+        областях (ROI-режим, див. core.processor.hand_search_region), порожній список — рук не шукаємо.
+        """
         h, w, _ = frame.shape
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = self.hands.process(rgb)
+        with stage("hands"):
+            if regions is None:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                result = self._get_hands(stream_id).process(rgb)
+                normalized = landmarks_to_array(result.multi_hand_landmarks)
+                handedness = handedness_labels(result.multi_handedness)
+            else:
+                normalized, handedness = self._process_regions(frame, regions, stream_id)
+
+        with stage("gesture"):
+            return self._classify_hands(normalized, handedness, w, h, overlay, self._get_trajectories(stream_id))
 
+    def _process_regions(self, frame, regions, stream_id):
+        """
+        Інференс рук лише на кропах кадру. Кроп зменшується так, щоб довша сторона була не більшою
+        за roi_size, а landmarks переводяться назад у нормалізовані координати всього кадру.
+        Повертає (landmarks (hands, 21, 3), handedness)
+        """
+        h, w, _ = frame.shape
+        found, handedness = [], []
+        for x1, y1, x2, y2 in merge_regions(regions):
+            crop = frame[y1:y2, x1:x2]
+            scale = min(1.0, self.roi_size / max(x2 - x1, y2 - y1))
+            if scale < 1.0:
+                crop = cv2.resize(crop, (max(1, round((x2 - x1) * scale)), max(1, round((y2 - y1) * scale))),
+                                  interpolation=cv2.INTER_AREA)
+            result = self._get_roi_hands(stream_id).process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+            if not result.multi_hand_landmarks:
+                continue
+
+            # Нормалізовані координати кропу -> нормалізовані координати кадру (z масштабується як x)
+            local = landmarks_to_array(result.multi_hand_landmarks)
+            cw, ch = x2 - x1, y2 - y1
+            local *= np.array([cw / w, ch / h, cw / w], dtype=np.float32)
+            local[:, :, 0] += x1 / w
+            local[:, :, 1] += y1 / h
+            found.append(local)
+            handedness.extend(handedness_labels(result.multi_handedness))
+
+        if not found:
+            return np.zeros((0, 21, 3), dtype=np.float32), handedness
+        return np.concatenate(found), handedness
+
+    def _get_trajectories(self, stream_id):
+        store = self.trajectories.get(stream_id)
+        if store is None:
+            store = HandTrajectoryStore(capacity=self.max_history_len)
+            self.trajectories[stream_id] = store
+        return store
+
+    def _classify_hands(self, normalized, handedness, w, h, overlay, trajectories):
+        """
+        Повертає список рук:
+        [{"gesture": str | None, "bbox": (x1, y1, x2, y2), "landmarks": np.ndarray (21, 3) float32 у пікселях,
+          "hand_id": стабільний id руки, "handedness": "Left" | "Right" | None}, ...]
+        """
         gestures = []
-        if not result.multi_hand_landmarks:
-            self.history.clear()
+        if not len(normalized):
+            trajectories.update(np.zeros((0, 2), dtype=np.float32))
             return gestures
 
-        # Очищаємо історію для рук, яких немає
-        current_hands = set(range(len(result.multi_hand_landmarks)))
-        for hand_idx in list(self.history.keys()):
-            if hand_idx not in current_hands:
-                del self.history[hand_idx]
+        # normalized — масив (hands, 21, 3) у нормалізованих координатах кадру, далі — лише операції над масивами
+        landmarks = to_pixels(normalized, w, h)
+        is_open = open_hands(normalized)
+        static = self.classifier.classify(landmarks)  # один батч на всі руки кадру
+        bboxes = hand_bboxes(landmarks)
+
+        # Траєкторії зіставляються з руками за найближчим зап'ястям, а не за індексом MediaPipe
+        hand_tracks = trajectories.update(normalized[:, 0, :2])
 
         # Обробляємо кожну руку
-        for i, hand_landmarks in enumerate(result.multi_hand_landmarks):
-            landmarks = [(int(lm.x * w), int(lm.y * h)) for lm in hand_landmarks.landmark]
-
-            wrist_x = hand_landmarks.landmark[0].x
-            wrist_y = hand_landmarks.landmark[0].y
-
-            if i not in self.history:
-                self.history[i] = []
-            self.history[i].append((wrist_x, wrist_y))
-            if len(self.history[i]) > self.max_history_len:
-                self.history[i].pop(0)
-
-            is_open = self._is_hand_open(hand_landmarks.landmark)
-            wave_detected = self._is_wave(self.history[i])
-            mp_drawing.draw_landmarks(
-                frame,
-                hand_landmarks,
-                mp_hands.HAND_CONNECTIONS,
-                mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
-                mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
-            )
+        for i, track in enumerate(hand_tracks):
+            if overlay is not None:
+                overlay.landmarks(landmarks[i])
 
-            if is_open and wave_detected:
+            if is_open[i] and track.is_wave():
                 gesture = "wave"
-                self.history[i].clear()  # очищаємо історію після розпізнавання маху
+                track.clear()  # очищаємо історію після розпізнавання маху
             else:
-                gesture = self._classify_static_gesture(landmarks)
+                gesture = static[i]
 
-            bbox = self._get_bbox(landmarks)
             gestures.append({
                 "gesture": gesture,
-                "bbox": bbox,
-                "landmarks": landmarks
+                "bbox": tuple(bboxes[i].tolist()),
+                "landmarks": landmarks[i],
+                "hand_id": track.track_id,
+                "handedness": handedness[i] if i < len(handedness) else None
             })
 
         return gestures
-
-    def _is_hand_open(self, landmarks):
-        """
-        Визначає, чи відкрита долоня.
-        Порівнюємо кінчики пальців (8, 12, 16, 20) з їхніми основами.
-        """
-        tips = [8, 12, 16, 20]
-        bases = [6, 10, 14, 18]
-
-        opened_fingers = 0
-        for t, b in zip(tips, bases):
-            if landmarks[t].y < landmarks[b].y:
-                opened_fingers += 1
-
-        return opened_fingers >= 3
-
-    def _is_wave(self, history):
-        if len(history) < 10:
-            return False
-
-        xs = [pos[0] for pos in history]
-        ys = [pos[1] for pos in history]
-
-        def analyze_axis(values):
-            diffs = np.diff(values)
-            significant_diffs = [d for d in diffs if abs(d) > 0.004]
-            if len(significant_diffs) < 5:
-                return 0, 0, 0
-            changes = 0
-            for i in range(len(significant_diffs) - 1):
-                if significant_diffs[i] * significant_diffs[i + 1] < 0:
-                    changes += 1
-            amplitude = max(values) - min(values)
-            avg_speed = np.mean(np.abs(diffs))
-            return changes, amplitude, avg_speed
-
-        changes_x, amp_x, speed_x = analyze_axis(xs)
-        changes_y, amp_y, speed_y = analyze_axis(ys)
-
-        if (changes_x >= 2 and amp_x > 0.05 and speed_x > 0.01) or \
-           (changes_y >= 2 and amp_y > 0.05 and speed_y > 0.01):
-            return True
-        return False
-
-    def _classify_static_gesture(self, lm):
-        wrist = lm[0]
-        
-        # Кінчики пальців (Tips)
-        thumb_tip = lm[4]
-        index_tip = lm[8]
-        middle_tip = lm[12]
-        ring_tip = lm[16]
-        pinky_tip = lm[20]
-        
-        # Суглоби (MCP/PIP) для порівняння
-        thumb_ip = lm[3]
-        index_mcp = lm[6]
-        middle_mcp = lm[10]
-        ring_mcp = lm[14]
-        pinky_mcp = lm[18]
-
-        # 1. 👍 thumbs_up: великий палець вгору, решта зігнуті
-        is_thumb_up = thumb_tip[1] < thumb_ip[1] < wrist[1]
-        fingers_folded = all(lm[i][1] > lm[i - 2][1] for i in [8, 12, 16, 20])
-
-        if is_thumb_up and fingers_folded:
-            return "thumbs_up"
-
-        # 2. ✌️ victory: вказівний та середній вгорі, підмізинний та мізинець зігнуті
-        # В координатах MediaPipe Y зменшується при русі вгору
-        is_index_up = index_tip[1] < index_mcp[1]
-        is_middle_up = middle_tip[1] < middle_mcp[1]
-        is_ring_down = ring_tip[1] > ring_mcp[1]
-        is_pinky_down = pinky_tip[1] > pinky_mcp[1]
-
-        if is_index_up and is_middle_up and is_ring_down and is_pinky_down:
-            return "victory"
-
-        return None
-
-    def _get_bbox(self, landmarks):
-        xs = [p[0] for p in landmarks]
-        ys = [p[1] for p in landmarks]
-        return min(xs), min(ys), max(xs), max(ys)
-    
@@ -0,0 +1,104 @@
+"""
+Тренування класифікатора статичних жестів і експорт в ONNX.
+
+    python -m gestures.train data/gestures.npz --output models/gestures.onnx
+
+Модель — невеликий MLP над normalize_landmarks (63 ознаки). Поруч із моделлю зберігається
+<model>.labels.json з назвами класів; GesturePredictor підхоплює модель автоматично.
+"""
+import argparse
+import json
+import os
+import numpy as np
+import torch
+from torch import nn
+from gestures.classifier import labels_path, normalize_landmarks
+from gestures.dataset import load_dataset
+
+
+def build_model(num_classes, hidden=128):
+    return nn.Sequential(
+        nn.Linear(63, hidden), nn.ReLU(), nn.Dropout(0.2),
+        nn.Linear(hidden, hidden // 2), nn.ReLU(),
+        nn.Linear(hidden // 2, num_classes),
+    )
+
+
+def augment(landmarks, rng):
+    """
+    Невеликі повороти, масштаб і шум, щоб модель не залежала від нахилу руки
+    """
+    angle = rng.uniform(-0.3, 0.3, size=len(landmarks))
+    cos, sin = np.cos(angle), np.sin(angle)
+    rot = np.stack([np.stack([cos, -sin], 1), np.stack([sin, cos], 1)], 1).astype(np.float32)  # (N, 2, 2)
+    out = landmarks.copy()
+    center = out[:, :1, :2]
+    out[:, :, :2] = np.einsum("nij,nkj->nki", rot, out[:, :, :2] - center) + center
+    out *= rng.uniform(0.8, 1.2, size=(len(out), 1, 1)).astype(np.float32)
+    out += rng.normal(0, 1.5, size=out.shape).astype(np.float32)
+    return out
+
+
+def train(landmarks, labels, num_classes, epochs=60, batch_size=256, lr=1e-3, val_split=0.15, seed=0):
+    rng = np.random.default_rng(seed)
+    torch.manual_seed(seed)
+
+    order = rng.permutation(len(labels))
+    n_val = int(len(order) * val_split)
+    val_idx, train_idx = order[:n_val], order[n_val:]
+
+    model = build_model(num_classes)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    loss_fn = nn.CrossEntropyLoss()
+
+    x_val = torch.from_numpy(normalize_landmarks(landmarks[val_idx]))
+    y_val = torch.from_numpy(labels[val_idx])
+
+    for epoch in range(epochs):
+        model.train()
+        perm = rng.permutation(train_idx)
+        for start in range(0, len(perm), batch_size):
+            batch = perm[start:start + batch_size]
+            x = torch.from_numpy(normalize_landmarks(augment(landmarks[batch], rng)))
+            y = torch.from_numpy(labels[batch])
+            optimizer.zero_grad()
+            loss = loss_fn(model(x), y)
+            loss.backward()
+            optimizer.step()
+
+        if n_val and (epoch + 1) % 10 == 0:
+            model.eval()
+            with torch.no_grad():
+                acc = (model(x_val).argmax(1) == y_val).float().mean().item()
+            print(f"[TRAIN] епоха {epoch + 1}: loss={loss.item():.4f} val_acc={acc:.3f}")
+    return model
+
+
+def export_onnx(model, output, label_names):
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    model.eval()
+    torch.onnx.export(
+        model, torch.zeros(1, 63), output,
+        input_names=["landmarks"], output_names=["logits"],
+        dynamic_axes={"landmarks": {0: "hands"}, "logits": {0: "hands"}},
+        opset_version=13,
+    )
+    with open(labels_path(output), "w", encoding="utf-8") as f:
+        json.dump(label_names, f, ensure_ascii=False)
+    print(f"[OK] Модель збережено: {output} ({len(label_names)} класів)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Тренування MLP жестів та експорт в ONNX")
+    parser.add_argument("dataset", help=".npz датасет (див. gestures/dataset.py)")
+    parser.add_argument("--output", default="models/gestures.onnx")
+    parser.add_argument("--epochs", type=int, default=60)
+    args = parser.parse_args()
+
+    landmarks, labels, label_names = load_dataset(args.dataset)
+    model = train(landmarks, labels, len(label_names), epochs=args.epochs)
+    export_onnx(model, args.output, label_names)
+
+
+if __name__ == "__main__":
+    main()
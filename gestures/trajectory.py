@@ -0,0 +1,165 @@
+from collections import deque
+import numpy as np
+
+
+class _AxisWindow:
+    """
+    Інкрементальна статистика однієї осі зап'ястя у ковзному вікні з capacity позицій.
+
+    Кожен push — амортизовано O(1): сума |diff|, значущі зсуви (|diff| > threshold),
+    кількість змін напрямку між сусідніми значущими зсувами та max/min вікна (монотонні черги).
+    Результат збігається з повним перерахунком по вікну.
+    """
+
+    def __init__(self, capacity, threshold):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        self.seq = -1
+        self.last = None
+        self.diffs = deque()          # (seq, diff)
+        self.sum_abs = 0.0
+        self.significant = deque()    # [seq, diff, чи змінився знак відносно попереднього значущого]
+        self.changes = 0
+        self._max = deque()           # (seq, value), значення спадають
+        self._min = deque()           # (seq, value), значення зростають
+
+    def push(self, value):
+        self.seq += 1
+        oldest = self.seq - self.capacity + 1  # найстаріша позиція у вікні
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self.seq, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((self.seq, value))
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+
+        if self.last is not None:
+            diff = value - self.last
+            self.diffs.append((self.seq, diff))
+            self.sum_abs += abs(diff)
+            if abs(diff) > self.threshold:
+                change = 1 if self.significant and self.significant[-1][1] * diff < 0 else 0
+                self.significant.append([self.seq, diff, change])
+                self.changes += change
+
+            # diff з номером n — це різниця позицій n і n-1, тож у вікні лише diff з n > oldest
+            while self.diffs and self.diffs[0][0] <= oldest:
+                seq, old = self.diffs.popleft()
+                self.sum_abs -= abs(old)
+                if self.significant and self.significant[0][0] == seq:
+                    self.significant.popleft()
+                    if self.significant:
+                        # Пара "видалений — новий перший" більше не у вікні
+                        self.changes -= self.significant[0][2]
+                        self.significant[0][2] = 0
+        self.last = value
+
+    def stats(self, min_significant=5):
+        """
+        (кількість змін напрямку, амплітуда, середня швидкість) або нулі, якщо рухів замало
+        """
+        if len(self.significant) < min_significant:
+            return 0, 0.0, 0.0
+        amplitude = self._max[0][1] - self._min[0][1]
+        avg_speed = max(self.sum_abs, 0.0) / len(self.diffs)
+        return self.changes, amplitude, avg_speed
+
+
+class HandTrajectory:
+    """
+    Траєкторія зап'ястя однієї руки зі стабільним track_id.
+    Окремо позиції не зберігаються: ознаки маху рахуються інкрементально у вікнах осей (_AxisWindow).
+    """
+
+    def __init__(self, track_id, capacity=15, min_len=10, threshold=0.004,
+                 min_changes=2, min_amplitude=0.05, min_speed=0.01):
+        self.track_id = track_id
+        self.capacity = capacity
+        self.min_len = min_len
+        self.min_changes = min_changes
+        self.min_amplitude = min_amplitude
+        self.min_speed = min_speed
+        self.count = 0    # скільки позицій у вікні (не більше capacity)
+        self.missing = 0  # скільки кадрів поспіль руку не бачили
+        self.last_position = np.zeros(2, dtype=np.float32)  # переживає clear(), щоб рука не губила трек
+        self._axes = (_AxisWindow(capacity, threshold), _AxisWindow(capacity, threshold))
+
+    def __len__(self):
+        return self.count
+
+    def push(self, x, y):
+        self.last_position = np.array((x, y), dtype=np.float32)
+        self.count = min(self.count + 1, self.capacity)
+        self.missing = 0
+        self._axes[0].push(float(x))
+        self._axes[1].push(float(y))
+
+    def clear(self):
+        self.count = 0
+        for axis in self._axes:
+            axis.reset()
+
+    def is_wave(self):
+        if self.count < self.min_len:
+            return False
+        for axis in self._axes:
+            changes, amplitude, speed = axis.stats()
+            if changes >= self.min_changes and amplitude > self.min_amplitude and speed > self.min_speed:
+                return True
+        return False
+
+
+class HandTrajectoryStore:
+    """
+    Траєкторії всіх рук однієї камери. Індекс руки від MediaPipe не є стабільною ідентичністю,
+    тому руки зіставляються з траєкторіями за найближчим зап'ястям.
+    """
+
+    def __init__(self, capacity=15, max_match_distance=0.15, max_missing=2):
+        self.capacity = capacity
+        self.max_match_distance = max_match_distance
+        self.max_missing = max_missing
+        self.tracks = []
+        self._next_id = 0
+
+    def update(self, wrists):
+        """
+        wrists: (hands, 2) нормалізовані координати зап'ясть.
+        Повертає список HandTrajectory у порядку рук, позиції вже додані.
+        """
+        assigned = [None] * len(wrists)
+        if self.tracks and len(wrists):
+            last = np.array([track.last_position for track in self.tracks])
+            dist = np.linalg.norm(wrists[:, None, :] - last[None, :, :], axis=2)
+            # Жадібно від найближчих пар: рук у кадрі мало
+            used = set()
+            for flat in np.argsort(dist, axis=None):
+                hand, track = divmod(int(flat), len(self.tracks))
+                if dist[hand, track] > self.max_match_distance:
+                    break
+                if assigned[hand] is None and track not in used:
+                    assigned[hand] = self.tracks[track]
+                    used.add(track)
+
+        for hand, track in enumerate(assigned):
+            if track is None:
+                track = HandTrajectory(self._next_id, capacity=self.capacity)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[hand] = track
+            track.push(*wrists[hand])
+
+        seen = {id(track) for track in assigned}
+        for track in self.tracks:
+            if id(track) not in seen:
+                track.missing += 1
+        self.tracks = [t for t in self.tracks if t.missing <= self.max_missing]
+        return assigned
@@ -1,132 +1,187 @@
-import platform
+import argparse
+import time
 import cv2
-import os
-import numpy as np
 from face.embedder import FaceEmbedder
 from face.recognizer import FaceRecognizer
+from face.tracker import FaceTracker
+from face.store import EmbeddingStore
+from face.adaptive import AdaptiveFaceController
+from face.enrollment import load_users_from_dict
 from gestures.predictor import GesturePredictor
-from core.controller import start_voice_assistant, handle_event
-from PIL import Image, ImageDraw, ImageFont
+from core.controller import SPEECH_BACKEND, prewarm_voice, start_voice_assistant, stop_voice_assistant
+from core.pipeline import FramePipeline
+from core.metrics import draw_hud, metrics, start_http_server, start_json_log
+from core.processor import FrameProcessor
+from core.streams import MultiStreamScheduler
+from core.sources import open_source
+from utils.overlay import Compositor
 from data.data import USERS_DATA
 
-def center(bbox):
-    x1, y1, x2, y2 = bbox
-    return ((x1 + x2) // 2, (y1 + y2) // 2)
-
-def is_hand_of_face(hand_bbox, face_bbox):
-    hx, hy = center(hand_bbox)
-    fx1, fy1, fx2, fy2 = face_bbox
-    padding_x = 200 
-    padding_y = 300
-    return (fx1 - padding_x <= hx <= fx2 + padding_x) and \
-           (fy1 <= hy <= fy2 + padding_y)
-
-def draw_text_ua(frame, text, position, color=(0, 255, 0), font_size=24):
-    h, w = frame.shape[:2]
-    current_os = platform.system()
-
-    # 1. Адаптивне масштабування шрифту
-    # На Mac Retina (Darwin) пікселів більше, тому множимо сильніше
-    if current_os == "Darwin":
-        scale = w / 640
-        final_font_size = int(font_size * scale * 1.5)
-    else:
-        # На Windows (та інших) масштабуємо відносно Full HD
-        scale = w / 1280
-        final_font_size = int(font_size * (scale if scale > 1 else 1))
-
-    # 2. Вибір шляху до шрифту
-    if current_os == "Windows":
-        font_path = "C:/Windows/Fonts/arial.ttf"
-    elif current_os == "Darwin":
-        font_path = "/System/Library/Fonts/Supplemental/Arial.ttf"
-    else:
-        font_path = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
-
-    # 3. Завантаження шрифту
+# Пайплайн-режим: захоплення, обличчя та руки працюють у окремих потоках паралельно
+PIPELINE_MODE = True
+STATS_INTERVAL_SEC = 5.0
+# Повна детекція + embedding облич лише раз на N кадрів, між ними — трекінг
+FACE_KEYFRAME_INTERVAL = 10
+# Без вікна: нічого не малюємо і не показуємо
+HEADLESS = False
+# Цільовий FPS для адаптивної якості детекції облич (None — завжди максимальна якість)
+TARGET_FPS = None
+# Руки шукаються лише в областях навколо облич знайомих користувачів
+ROI_HANDS = False
+# Метрики стадій: порт Prometheus-ендпоінта на 127.0.0.1 та період JSON-логів (None — вимкнено)
+METRICS_PORT = None
+METRICS_LOG_SEC = None
+
+def show(frame, headless):
+    if headless:
+        return True
+    cv2.imshow("AI Assistant", frame)
+    return cv2.waitKey(1) & 0xFF != 27
+
+def run_serial(cap, processor, headless, max_frames=None):
+    frames = 0
+    while max_frames is None or frames < max_frames:
+        ret, frame = cap.read()
+        if not ret: break
+
+        frame, _, _ = processor.process(frame)
+        frames += 1
+        if not show(frame, headless): break
+
+def run_pipelined(cap, processor, headless, max_frames=None):
+    def face_stage(packet):
+        return processor.detect_faces(packet.frame)
+
+    def hands_stage(packet):
+        overlay = processor.new_overlay()
+        with metrics.frame(processor.stream_id):
+            gestures = processor.predict_gestures(packet.frame, overlay)
+        return {"gestures": gestures, "overlay": overlay}
+
+    pipeline = FramePipeline(cap, {"face": face_stage, "hands": hands_stage})
+    pipeline.start()
+    last_report = time.perf_counter()
+    frames = 0
+
     try:
-        if os.path.exists(font_path):
-            font = ImageFont.truetype(font_path, final_font_size)
-        else:
-            font = ImageFont.truetype("arial.ttf", final_font_size)
-    except:
-        font = ImageFont.load_default()
-
-    # 4. Малювання через PIL
-    img_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-    draw = ImageDraw.Draw(img_pil)
-    
-    # PIL використовує (R, G, B), а OpenCV (B, G, R)
-    # color[2], color[1], color[0] — це конвертація BGR -> RGB
-    fill_color = (color[2], color[1], color[0])
-    
-    # Додаємо обводку/тінь для читабельності (опціонально, але корисно)
-    x, y = position
-    draw.text((x + 1, y + 1), text, font=font, fill=(0, 0, 0))
-    draw.text(position, text, font=font, fill=fill_color)
-    
-    return cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
-
-def load_users_from_dict(data, embedder, recognizer, base_path="data"):
-    for user_id, images in data.items():
-        print(f"[INFO] Завантаження користувача: {user_id}")
-        for img_rel_path in images:
-            img_path = os.path.join(base_path, img_rel_path)
-            img = cv2.imread(img_path)
-            if img is None:
-                continue
-            faces = embedder.get_embeddings(img)
-            if faces:
-                recognizer.add_user(user_id, faces[0]["embedding"])
-        print(f"[OK] {user_id} готовий\n")
+        while not pipeline.finished and (max_frames is None or frames < max_frames):
+            item = pipeline.get_result(timeout=0.1)
+            if item is None: continue
+
+            packet, results = item
+            start = time.perf_counter()
+            recognized_users = results["face"] or []
+            hands = results["hands"] or {"gestures": [], "overlay": None}
+
+            with metrics.frame(processor.stream_id):
+                overlay = processor.new_overlay()
+                overlay.extend(hands["overlay"])
+                processor.process_results(recognized_users, hands["gestures"], overlay)
+                draw_hud(overlay, processor.stream_id, packet.frame.shape[0])
+                # Кадр пакета більше ніхто не читає, тож малюємо прямо на ньому
+                frame = processor.render(packet.frame, overlay, copy=False)
+            pipeline.render_stats.record(time.perf_counter() - start)
+            # Затримка від захоплення кадру до готового зображення
+            metrics.observe_frame(time.perf_counter() - packet.timestamp, processor.stream_id)
+            frames += 1
+
+            if time.perf_counter() - last_report > STATS_INTERVAL_SEC:
+                print(f"[PIPE] {pipeline.format_stats()}")
+                last_report = time.perf_counter()
+
+            if not show(frame, headless): break
+    finally:
+        pipeline.stop()
+
+def run_multi(streams, headless, max_frames=None):
+    scheduler = MultiStreamScheduler(streams)
+    scheduler.start()
+    last_report = time.perf_counter()
+    rounds = 0
+
+    try:
+        while not scheduler.finished and (max_frames is None or rounds < max_frames):
+            results = scheduler.next_round()
+            if not results: continue
+            rounds += 1
+
+            if time.perf_counter() - last_report > STATS_INTERVAL_SEC:
+                print(f"[STREAMS] {scheduler.format_stats()}")
+                last_report = time.perf_counter()
+
+            if headless: continue
+            for stream, frame, _, _ in results:
+                cv2.imshow(f"AI Assistant [{stream.stream_id}]", frame)
+            if cv2.waitKey(1) & 0xFF == 27: break
+    finally:
+        scheduler.stop()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI Assistant: обличчя + жести + голос")
+    parser.add_argument("--source", nargs="+", default=["0"],
+                        help="індекс камери, відеофайл, RTSP/HTTP URL або папка з кадрами; "
+                             "кілька джерел — кілька камер в одному процесі")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS,
+                        help="без вікна та малювання (сервер)")
+    parser.add_argument("--serial", action="store_true", default=not PIPELINE_MODE,
+                        help="послідовна обробка замість багатопотокового пайплайну")
+    parser.add_argument("--roi-hands", action="store_true", default=ROI_HANDS,
+                        help="шукати руки лише навколо облич знайомих користувачів")
+    parser.add_argument("--target-fps", type=float, default=TARGET_FPS,
+                        help="автоматично знижувати якість детекції облич, щоб тримати цей FPS")
+    parser.add_argument("--speech", choices=["google", "vosk"], default=SPEECH_BACKEND,
+                        help="розпізнавання мовлення: google (мережа) або vosk (офлайн, models/vosk-uk)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="віддавати метрики стадій у форматі Prometheus на http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-log", type=float, default=METRICS_LOG_SEC, metavar="SEC",
+                        help="друкувати знімок метрик JSON-рядком кожні SEC секунд")
+    parser.add_argument("--hud", action="store_true", help="показувати FPS і час стадій на кадрі")
+    parser.add_argument("--no-voice", action="store_true", help="не запускати голосовий асистент")
+    parser.add_argument("--max-frames", type=int, default=None)
+    return parser.parse_args()
 
 def main():
-    cap = cv2.VideoCapture(0)
+    args = parse_args()
+    metrics.enabled = bool(args.metrics_port or args.metrics_log or args.hud)
+    metrics.hud = args.hud
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+    if args.metrics_log:
+        start_json_log(args.metrics_log)
+    caps = [open_source(source) for source in args.source]
+    # Моделі облич і жестів завантажуються один раз і діляться між усіма камерами
     embedder = FaceEmbedder(device="cpu")
     recognizer = FaceRecognizer(threshold=0.4)
     gesture_predictor = GesturePredictor()
+    compositor = Compositor(enabled=not args.headless)
+    processors = [
+        FrameProcessor(FaceTracker(embedder, recognizer, keyframe_interval=FACE_KEYFRAME_INTERVAL),
+                       gesture_predictor, compositor, stream_id=stream_id, roi_hands=args.roi_hands,
+                       adaptive=AdaptiveFaceController(args.target_fps) if args.target_fps else None)
+        for stream_id in range(len(caps))
+    ]
+
+    store = EmbeddingStore(model_name=embedder.model_name)
+    load_users_from_dict(data=USERS_DATA, embedder=embedder, recognizer=recognizer, store=store)
+    prewarm_voice(USERS_DATA.keys())
+    if not args.no_voice:
+        start_voice_assistant(backend=args.speech)
 
-    load_users_from_dict(data=USERS_DATA, embedder=embedder, recognizer=recognizer)
-    start_voice_assistant()
+    try:
+        if len(caps) > 1:
+            run_multi([(i, cap, proc) for i, (cap, proc) in enumerate(zip(caps, processors))],
+                      args.headless, args.max_frames)
+        elif args.serial:
+            run_serial(caps[0], processors[0], args.headless, args.max_frames)
+        else:
+            run_pipelined(caps[0], processors[0], args.headless, args.max_frames)
+    finally:
+        stop_voice_assistant()
 
-    while True:
-        ret, frame = cap.read()
-        if not ret: break
+    for cap in caps:
+        cap.release()
+    if not args.headless:
+        cv2.destroyAllWindows()
 
-        faces = embedder.get_embeddings(frame)
-        recognized_users = []
-        last_found_user = None
-
-        # Обробка облич
-        for face in faces:
-            user_id = recognizer.recognize(face["embedding"])
-            bbox = face["bbox"]
-            recognized_users.append({"user_id": user_id, "bbox": bbox})
-
-            x1, y1, x2, y2 = bbox
-            color = (0, 255, 0) if user_id else (0, 0, 255)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            
-            label = user_id if user_id else "Невідомо"
-            frame = draw_text_ua(frame, label, (x1, y1 - 35), color, font_size=28)
-
-        # Обробка жестів
-        gestures = gesture_predictor.predict_gestures(frame)
-        for g in gestures:
-            if not g["gesture"]: continue
-            
-            gx1, gy1, gx2, gy2 = g["bbox"]
-            cv2.putText(frame, g["gesture"], (gx1, gy1 - 10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-
-            for user in recognized_users:
-                if user["user_id"] and is_hand_of_face(g["bbox"], user["bbox"]):
-                    handle_event(user_id=user["user_id"], gesture=g["gesture"], frame=frame)
-
-        cv2.imshow("AI Assistant", frame)
-        if cv2.waitKey(1) & 0xFF == 27: break
-
-    cap.release()
-    cv2.destroyAllWindows()
-
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+from utils.app_index import AppIndex
+
+
+def make_tree(root):
+    """
+    root/
+        Telegram/Telegram.exe
+        Tools/Notes/notepad.exe
+        Tools/readme.txt
+    """
+    for path in ("Telegram/Telegram.exe", "Tools/Notes/notepad.exe", "Tools/readme.txt"):
+        full = root / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_text("")
+
+
+def bump_mtime(directory, delta=10):
+    # mtime папки після змін може збігтися з попереднім у межах роздільної здатності ФС
+    stat = os.stat(directory)
+    os.utime(directory, (stat.st_atime, stat.st_mtime + delta))
+
+
+def test_first_build_and_incremental_refresh(tmp_path):
+    root = tmp_path / "apps"
+    make_tree(root)
+    index = AppIndex(roots=[str(root)], db_path=str(tmp_path / "index.db"))
+
+    assert index.refresh() == 4  # apps, Telegram, Tools, Tools/Notes
+    assert index.lookup("telegram.exe") == str(root / "Telegram" / "Telegram.exe")
+    assert index.lookup("NOTEPAD.EXE") == str(root / "Tools" / "Notes" / "notepad.exe")
+    assert index.lookup("readme.txt") is None
+
+    # Без змін на диску нічого не перечитується
+    assert index.refresh() == 0
+
+    # Новий файл: перечитується лише його папка
+    (root / "Telegram" / "Updater.exe").write_text("")
+    bump_mtime(root / "Telegram")
+    assert index.refresh() == 1
+    assert index.lookup("updater.exe") == str(root / "Telegram" / "Updater.exe")
+    assert index.lookup("telegram.exe") is not None
+
+
+def test_removed_folder_is_dropped(tmp_path):
+    root = tmp_path / "apps"
+    make_tree(root)
+    db_path = str(tmp_path / "index.db")
+    index = AppIndex(roots=[str(root)], db_path=db_path)
+    index.refresh()
+
+    shutil.rmtree(root / "Tools")
+    bump_mtime(root)
+    assert index.refresh() == 1  # лише корінь, вміст якого змінився
+    assert index.lookup("notepad.exe") is None
+    assert index.lookup("telegram.exe") is not None
+
+    # Зниклі папки видалено й з бази
+    rows = index.conn.execute("SELECT dir FROM app_index_dirs").fetchall()
+    assert sorted(os.path.basename(d) for d, in rows) == ["Telegram", "apps"]
+
+
+def test_lookup_miss_does_not_block(tmp_path):
+    root = tmp_path / "apps"
+    make_tree(root)
+    index = AppIndex(roots=[str(root)], db_path=str(tmp_path / "index.db"))
+
+    # Індекс ще не будувався: промах повертається одразу й лише просить фонове оновлення
+    assert index.lookup("telegram.exe") is None
+    assert index._refresh_requested.is_set()
+    assert not index.ready.is_set()
+
+    index.start()
+    assert index.ready.wait(timeout=5)
+    assert index.lookup("telegram.exe") == str(root / "Telegram" / "Telegram.exe")
+    index.stop()
+
+
+def test_miss_falls_back_to_drive_search(tmp_path):
+    root = tmp_path / "apps"
+    make_tree(root)
+    custom = tmp_path / "custom" / "bin" / "Custom.exe"
+    custom.parent.mkdir(parents=True)
+    custom.write_text("")
+    index = AppIndex(roots=[str(root)], db_path=str(tmp_path / "index.db"), fallback_root=str(tmp_path))
+    index.refresh()
+
+    # Поза коренями індексу: промах, ім'я чекає на пошук по диску
+    assert index.lookup("custom.exe") is None
+    assert index.searching
+    assert index.search_missed() == 1
+    assert not index.searching
+    assert index.lookup("custom.exe") == str(custom)
+
+    # Ненайдене ім'я повторно по диску не шукається (до refresh_interval)
+    assert index.lookup("missing.exe") is None
+    assert index.search_missed() == 0
+    assert index.lookup("missing.exe") is None
+    index._missed.clear()
+
+    # Файл зник — запис замінюється новою знахідкою
+    moved = tmp_path / "custom" / "Custom.exe"
+    custom.rename(moved)
+    assert index.lookup("custom.exe") is None
+    assert index.search_missed() == 1
+    assert index.lookup("custom.exe") == str(moved)
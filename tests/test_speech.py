@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import wave
+import pytest
+from core.commands import CommandMatcher
+from core.speech import CHUNK_FRAMES, SpeechHandler, VoskSpeechBackend, create_backend
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+# PCM 16 біт моно 16 кГц, 4.5 с (18 шматків по CHUNK_FRAMES): "як справи", пауза, "телеграм"
+WAV_PATH = os.path.join(FIXTURES, "yak_spravy_telegram_16k.wav")
+WAV_CHUNKS = 18
+VOSK_MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", "models/vosk-uk")
+
+
+class RecordingHandler(SpeechHandler):
+    """
+    Як VoiceCommandHandler: проміжна гіпотеза обробляється, якщо в ній однозначна ключова фраза
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.partials, self.finals, self.handled = [], [], []
+
+    def on_partial(self, text):
+        self.partials.append(text)
+        match = self.matcher.match(text, unambiguous=True)
+        if match is None:
+            return False
+        self.handled.append((len(self.partials), match.keyword))
+        return True
+
+    def on_final(self, text):
+        self.finals.append(text)
+
+
+class ScriptedRecognizer:
+    """
+    Замість KaldiRecognizer: на кожен шматок аудіо видає наступний крок сценарію —
+    ("partial", текст) або ("final", текст)
+    """
+
+    def __init__(self, script, sample_rate):
+        self.script = list(script)
+        self.sample_rate = sample_rate
+        self.chunks = 0
+        self.partial = ""
+
+    def AcceptWaveform(self, chunk):
+        self.chunks += 1
+        kind, text = self.script.pop(0) if self.script else ("partial", self.partial)
+        if kind == "final":
+            self.final, self.partial = text, ""
+            return True
+        self.partial = text
+        return False
+
+    def PartialResult(self):
+        return json.dumps({"partial": self.partial})
+
+    def Result(self):
+        return json.dumps({"text": self.final})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+
+SCRIPT = [
+    ("partial", "як"),
+    ("partial", "як справи"),            # однозначна фраза — обробляється тут, до кінця фрази
+    ("partial", "як справи"),
+    ("final", "як справи"),
+    ("partial", "[unk] телеграм"),       # "телеграм" — частина "телеграм веб", ще може змінитись
+    ("partial", "[unk] телеграм [unk]"),
+    ("partial", "[unk] телеграм [unk]"),
+    ("final", "[unk] телеграм [unk]"),
+]
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    db_path = str(tmp_path / "assistant.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE apps (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT, app_name TEXT, path TEXT)")
+    conn.execute("CREATE TABLE commands (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT, response TEXT)")
+    conn.executemany("INSERT INTO apps (keyword, app_name, path) VALUES (?, ?, '')",
+                     [("телеграм", "Telegram.exe"), ("телеграм веб", "chrome.exe")])
+    conn.execute("INSERT INTO commands (keyword, response) VALUES ('як справи', 'Чудово')")
+    conn.commit()
+    conn.close()
+    return CommandMatcher(db_path)
+
+
+@pytest.fixture
+def scripted_backend():
+    # Логіка stream/transcribe_wav без моделі: розпізнавач замінено сценарієм
+    backend = VoskSpeechBackend.__new__(VoskSpeechBackend)
+    backend.sample_rate = 16000
+    backend.grammar = None
+    backend.recognizers = []
+
+    def new_recognizer(sample_rate=None):
+        rec = ScriptedRecognizer(SCRIPT, sample_rate)
+        backend.recognizers.append(rec)
+        return rec
+
+    backend._new_recognizer = new_recognizer
+    return backend
+
+
+def test_fixture_format():
+    with wave.open(WAV_PATH, "rb") as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, 16000)
+        assert wav.getnframes() == WAV_CHUNKS * CHUNK_FRAMES
+
+
+def test_partial_triggers_unambiguous_keyword_early(scripted_backend, matcher):
+    handler = RecordingHandler(matcher)
+    scripted_backend.transcribe_wav(WAV_PATH, handler)
+
+    rec = scripted_backend.recognizers[0]
+    assert rec.sample_rate == 16000 and rec.chunks == WAV_CHUNKS
+    # "як справи" спрацювала на другій проміжній гіпотезі, "телеграм" (неоднозначна) — ні
+    assert handler.handled == [(2, "як справи")]
+
+
+def test_handled_phrase_is_not_finalized_again(scripted_backend, matcher):
+    handler = RecordingHandler(matcher)
+    text = scripted_backend.transcribe_wav(WAV_PATH, handler)
+
+    assert handler.finals == ["телеграм"]
+    assert text == "як справи телеграм"
+    # Після обробленої фрази її повторні гіпотези в обробник не йдуть
+    assert handler.partials.count("як справи") == 1
+
+
+def test_unk_is_stripped(scripted_backend, matcher):
+    handler = RecordingHandler(matcher)
+    scripted_backend.transcribe_wav(WAV_PATH, handler)
+
+    assert handler.partials == ["як", "як справи", "телеграм"]
+    assert all("[unk]" not in text for text in handler.partials + handler.finals)
+
+
+def test_vosk_model_on_fixture(matcher):
+    pytest.importorskip("vosk")
+    if not os.path.isdir(VOSK_MODEL_PATH):
+        pytest.skip(f"модель Vosk не встановлена ({VOSK_MODEL_PATH})")
+
+    backend = create_backend("vosk", VOSK_MODEL_PATH, grammar=matcher.keywords())
+    assert isinstance(backend, VoskSpeechBackend)
+    handler = RecordingHandler(matcher)
+    text = backend.transcribe_wav(WAV_PATH, handler)
+
+    # Однозначна команда спрацьовує на проміжній гіпотезі, тобто ще до кінця фрази
+    assert [keyword for _, keyword in handler.handled] == ["як справи"]
+    assert "як справи" not in handler.finals
+    # "телеграм" — частина "телеграм веб", тож чекає на фінальний результат
+    assert handler.finals == ["телеграм"]
+    assert "як справи" in text and "[unk]" not in text
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from utils.voice_engine import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, SilentSynthesizer, VoiceEngine
+
+
+@pytest.fixture(scope="module")
+def mixer():
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        pytest.skip(f"pygame.mixer недоступний: {e}")
+    yield
+    pygame.mixer.quit()
+
+
+def test_identical_phrase_is_synthesized_once(tmp_path, mixer):
+    synth = SilentSynthesizer()
+    engine = VoiceEngine(synth, cache_dir=str(tmp_path))
+
+    assert engine.say("Привіт", PRIORITY_HIGH).done.wait(5)
+    assert engine.say("Привіт", PRIORITY_HIGH).done.wait(5)
+    engine.prewarm(["Привіт"])
+    engine._prewarm_pool.submit(lambda: None).result(5)
+    # Кеш на диску переживає рушій
+    assert VoiceEngine(synth, cache_dir=str(tmp_path)).say("Привіт").done.wait(5)
+
+    assert synth.calls == 1
+
+
+def test_queued_duplicate_merges_with_higher_priority(tmp_path, mixer):
+    engine = VoiceEngine(SilentSynthesizer(), cache_dir=str(tmp_path))
+
+    # Поки тримаємо умову, потік відтворення не забере жодної фрази з черги
+    with engine._cond:
+        low = engine.say("Бувайте!", PRIORITY_LOW)
+        normal = engine.say("Бувайте!", PRIORITY_NORMAL)
+        assert normal is low
+        assert low.priority == PRIORITY_NORMAL
+        assert list(engine._pending) == ["Бувайте!"]
+
+    assert low.done.wait(5)
+    assert not engine._pending
+
+
+def test_high_priority_plays_before_low(tmp_path, mixer):
+    engine = VoiceEngine(SilentSynthesizer(seconds=0.3), cache_dir=str(tmp_path))
+    order = []
+    lock = threading.Lock()
+
+    with engine._cond:
+        low = engine.say("Привіт, Оля. Рада тебе бачити", PRIORITY_LOW)
+        high = engine.say("У мене все чудово", PRIORITY_HIGH)
+
+    def record(name, utterance):
+        utterance.done.wait(5)
+        with lock:
+            order.append(name)
+
+    threads = [threading.Thread(target=record, args=args) for args in (("low", low), ("high", high))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert order == ["high", "low"]
+
+
+class SlowSynthesizer(SilentSynthesizer):
+    # Як мережевий edge-tts: кожна фраза синтезується помітний час
+    def synthesize(self, text, path):
+        time.sleep(0.2)
+        super().synthesize(text, path)
+
+
+def test_say_does_not_wait_for_prewarm_backlog(tmp_path, mixer):
+    engine = VoiceEngine(SlowSynthesizer(), cache_dir=str(tmp_path))
+    engine.prewarm([f"Відкриваю програму {i}" for i in range(20)])  # ~4 с у черзі попереднього синтезу
+
+    start = time.perf_counter()
+    assert engine.say("Будь ласка, авторизуйтесь жестом для доступу.", PRIORITY_HIGH).done.wait(5)
+    assert time.perf_counter() - start < 1.0
@@ -0,0 +1,283 @@
+import json
+import os
+import platform
+import threading
+import time
+from utils.database import DB_PATH, db_lock, get_connection
+
+
+def default_roots():
+    if platform.system() != "Windows":
+        return []
+    return [
+        os.path.expanduser("~/AppData/Roaming"),
+        os.path.expanduser("~/AppData/Local/Programs"),
+        "C:/Program Files",
+        "C:/Program Files (x86)",
+    ]
+
+
+def default_fallback_root():
+    # Як колишній пошук "where /R" по диску C: програми поза коренями індексу (System32, власні папки встановлення)
+    return "C:/" if platform.system() == "Windows" else None
+
+
+class AppIndex:
+    """
+    Індекс виконуваних файлів (ім'я -> шлях) у таблицях app_index / app_index_dirs бази assistant.db.
+
+    Будується у фоновому потоці. Для кожної папки зберігаються mtime і список підпапок: якщо mtime
+    не змінився, папка не перечитується (лише stat), тож повторне оновлення дешеве. Пошук — звичайний
+    dict у пам'яті, він ніколи не чекає на диск; промах лише просить фоновий потік оновити індекс.
+
+    Коренями індексу покрито лише типові папки програм. Якщо після оновлення програми все ще немає,
+    фоновий потік шукає саме її ім'я по всьому fallback_root (на Windows — диск C:) і додає знахідку
+    в індекс з найнижчим пріоритетом. Ненайдене ім'я повторно шукається не частіше
+    ніж раз на refresh_interval.
+    """
+
+    def __init__(self, roots=None, extensions=(".exe",), db_path=DB_PATH, max_depth=6, refresh_interval=600,
+                 fallback_root=None):
+        """
+        fallback_root: None — default_fallback_root(); "" — без пошуку по всьому диску
+        """
+        self.roots = [os.path.normpath(r) for r in (default_roots() if roots is None else roots)]
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.max_depth = max_depth
+        self.refresh_interval = refresh_interval
+        self.conn = get_connection(db_path)
+        self.ready = threading.Event()        # перше оновлення завершено
+        self._refresh_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._paths = {}
+        self.fallback_root = default_fallback_root() if fallback_root is None else fallback_root
+        self._missed = set()       # імена, яких не знайшов lookup (чекають на пошук по диску)
+        self._missed_lock = threading.Lock()
+        self._searched_at = {}     # ім'я -> коли його востаннє шукали по диску
+        self._searching = False
+
+        with db_lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS app_index (
+                    path TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    dir TEXT NOT NULL,
+                    root INTEGER NOT NULL
+                )
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS app_index_dir ON app_index (dir)")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS app_index_dirs (
+                    dir TEXT PRIMARY KEY,
+                    mtime REAL NOT NULL,
+                    subdirs TEXT NOT NULL
+                )
+            ''')
+            self.conn.commit()
+        # Збережений індекс доступний одразу, ще до першого оновлення
+        self._reload_map()
+
+    # --- Пошук ---
+    def lookup(self, app_name):
+        """
+        Шлях до програми або None. Не блокує: якщо програми немає (або файл зник), індекс оновиться у фоні
+        """
+        name = app_name.lower()
+        path = self._paths.get(name)
+        if path and os.path.exists(path):
+            return path
+        with self._missed_lock:
+            self._missed.add(name)
+        self.request_refresh()
+        return None
+
+    @property
+    def searching(self):
+        """
+        Чи є промахи, які ще шукаються у фоні
+        """
+        return self._searching or bool(self._missed)
+
+    def request_refresh(self):
+        self._refresh_requested.set()
+
+    # --- Фоновий потік ---
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="app-index", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._refresh_requested.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[WARN] Індекс програм: {e}")
+            self.ready.set()
+            try:
+                self.search_missed()
+            except Exception as e:
+                print(f"[WARN] Пошук програм на диску: {e}")
+            self._refresh_requested.wait(timeout=self.refresh_interval)
+            self._refresh_requested.clear()
+
+    def refresh(self):
+        """
+        Інкрементальне оновлення: перечитуються лише папки зі зміненим mtime.
+        Повертає кількість перечитаних папок
+        """
+        with db_lock:
+            known = {d: (mtime, json.loads(subdirs)) for d, mtime, subdirs in
+                     self.conn.execute("SELECT dir, mtime, subdirs FROM app_index_dirs")}
+
+        seen, scanned = set(), {}  # scanned: папка -> (mtime, підпапки, файли)
+        for root_idx, root in enumerate(self.roots):
+            stack = [(root, 0)]
+            while stack and not self._stop.is_set():
+                directory, depth = stack.pop()
+                if directory in seen:
+                    continue
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                seen.add(directory)
+
+                cached = known.get(directory)
+                if cached is not None and cached[0] == mtime:
+                    subdirs = cached[1]
+                else:
+                    subdirs, files = self._scan_directory(directory)
+                    scanned[directory] = (mtime, subdirs, [(path, name, directory, root_idx) for path, name in files])
+                if depth < self.max_depth:
+                    stack.extend((d, depth + 1) for d in reversed(subdirs))
+
+        # Усі зміни одного оновлення — однією транзакцією: db_lock спільний з голосовими командами
+        # і діями жестів, тож тримати його на кожну папку окремо не можна
+        removed = [d for d in known if d not in seen] if not self._stop.is_set() else []
+        if scanned or removed:
+            with db_lock:
+                with self.conn:
+                    dirs = [(d,) for d in list(scanned) + removed]
+                    self.conn.executemany("DELETE FROM app_index WHERE dir = ?", dirs)
+                    self.conn.executemany("DELETE FROM app_index_dirs WHERE dir = ?", [(d,) for d in removed])
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO app_index (path, name, dir, root) VALUES (?, ?, ?, ?)",
+                        [row for _, _, rows in scanned.values() for row in rows]
+                    )
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO app_index_dirs (dir, mtime, subdirs) VALUES (?, ?, ?)",
+                        [(d, mtime, json.dumps(subdirs)) for d, (mtime, subdirs, _) in scanned.items()]
+                    )
+        if scanned or removed or not self._paths:
+            self._reload_map()
+        return len(scanned)
+
+    def search_missed(self):
+        """
+        Пошук по fallback_root імен, яких немає в індексі. Повертає кількість знайдених
+        """
+        self._searching = True
+        try:
+            with self._missed_lock:
+                names, self._missed = self._missed, set()
+            if not self.fallback_root:
+                return 0
+            now = time.monotonic()
+            names = {
+                name for name in names
+                if not (self._paths.get(name) and os.path.exists(self._paths[name]))
+                and now - self._searched_at.get(name, float("-inf")) >= self.refresh_interval
+            }
+            if not names:
+                return 0
+
+            found = self._search_drive(names)
+            if self._stop.is_set():
+                return 0
+            # Затримка повторного пошуку лише для ненайдених: знайдений файл, що потім зник, шукаємо одразу
+            for name in names:
+                if name in found:
+                    self._searched_at.pop(name, None)
+                else:
+                    self._searched_at[name] = now
+            fallback = len(self.roots)  # після всіх коренів
+            with db_lock:
+                with self.conn:
+                    self.conn.executemany("DELETE FROM app_index WHERE name = ? AND root = ?",
+                                          [(name, fallback) for name in names])
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO app_index (path, name, dir, root) VALUES (?, ?, ?, ?)",
+                        [(path, name, os.path.dirname(path), fallback) for name, path in found.items()]
+                    )
+            self._reload_map()
+            return len(found)
+        finally:
+            self._searching = False
+
+    def _search_drive(self, names):
+        """
+        Перший шлях для кожного імені з names при обході fallback_root: {ім'я: шлях}
+        """
+        found = {}
+        for directory, subdirs, files in os.walk(self.fallback_root):
+            if self._stop.is_set():
+                break
+            subdirs.sort()
+            for file_name in files:
+                name = file_name.lower()
+                if name in names and name not in found:
+                    found[name] = os.path.join(directory, file_name)
+            if len(found) == len(names):
+                break
+        return found
+
+    def _scan_directory(self, directory):
+        """
+        Підпапки (відсортовані) і виконувані файли [(шлях, ім'я в нижньому регістрі), ...] однієї папки
+        """
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(self.extensions):
+                            files.append((entry.path, entry.name.lower()))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        subdirs.sort()
+        return subdirs, files
+
+    def _reload_map(self):
+        # Якщо ім'я трапляється кілька разів — перемагає раніший корінь, далі коротший шлях
+        with db_lock:
+            rows = self.conn.execute(
+                "SELECT name, path FROM app_index ORDER BY root, length(path), path"
+            ).fetchall()
+        paths = {}
+        for name, path in rows:
+            paths.setdefault(name, path)
+        self._paths = paths  # атомарна заміна, пошук іде без блокувань
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_app_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            # Індекс будується у фоні з першого звернення: і для голосу, і для дій жестів (навіть з --no-voice)
+            _index = AppIndex().start()
+        return _index
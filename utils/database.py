@@ -0,0 +1,48 @@
+import sqlite3
+import threading
+
+DB_PATH = "assistant.db"
+
+# Одне довготривале з'єднання на файл бази, спільне для всіх потоків.
+# sqlite3 не можна одночасно використовувати з кількох потоків, тому всі звернення йдуть під db_lock.
+db_lock = threading.RLock()
+_connections = {}
+
+
+def get_connection(db_path=DB_PATH):
+    with db_lock:
+        conn = _connections.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            _connections[db_path] = conn
+        return conn
+
+
+def watch_tables(tables, db_path=DB_PATH):
+    """
+    Лічильники змін для таблиць: тригери на INSERT/UPDATE/DELETE збільшують рядок у table_versions.
+    Тригери спрацьовують для будь-якого з'єднання (цей процес, sqlite3 CLI, скрипти), а записи
+    в інші таблиці (face_embeddings, app_index) лічильники не чіпають
+    """
+    with db_lock:
+        conn = get_connection(db_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        for table in tables:
+            conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+            for op in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_{op.lower()}_version AFTER {op} ON {table}
+                    BEGIN UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END
+                """)
+        conn.commit()
+
+
+def table_version(tables, db_path=DB_PATH):
+    """
+    Ознака змін у таблицях (див. watch_tables): кортеж лічильників у порядку tables
+    """
+    with db_lock:
+        rows = dict(get_connection(db_path).execute(
+            f"SELECT name, version FROM table_versions WHERE name IN ({', '.join('?' * len(tables))})", tuple(tables)
+        ).fetchall())
+    return tuple(rows.get(table) for table in tables)
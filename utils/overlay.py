@@ -0,0 +1,247 @@
+import os
+import platform
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+CURRENT_OS = platform.system()  # 'Windows', 'Darwin' (Mac) або 'Linux'
+
+
+def default_font_path():
+    if CURRENT_OS == "Windows":
+        return "C:/Windows/Fonts/arial.ttf"
+    if CURRENT_OS == "Darwin":
+        return "/System/Library/Fonts/Supplemental/Arial.ttf"
+    return "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+@lru_cache(maxsize=64)
+def get_font(font_path, size):
+    """
+    Шрифт кешується за (шлях, розмір): ImageFont.truetype читає і парсить файл шрифту щоразу
+    """
+    try:
+        if os.path.exists(font_path):
+            return ImageFont.truetype(font_path, size)
+        # Якщо файл не знайдено, намагаємося завантажити системний шрифт за назвою
+        return ImageFont.truetype("arial.ttf", size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+def scale_font_size(frame_width, font_size, darwin_factor=1.5):
+    """
+    Адаптивне масштабування шрифту під ширину кадру.
+    На Mac Retina (Darwin) пікселів більше, тому множимо сильніше; на інших ОС — відносно 1280px.
+    """
+    if CURRENT_OS == "Darwin":
+        return int(font_size * (frame_width / 640) * darwin_factor)
+    scale = frame_width / 1280
+    return int(font_size * (scale if scale > 1 else 1))
+
+
+class TextSprite:
+    """
+    Заздалегідь растеризований підпис: premultiplied BGR та альфа-канал як маленькі float32 масиви.
+    (dx, dy) — зсув спрайта відносно точки, яку передають у draw.text.
+    """
+
+    __slots__ = ("bgr", "alpha", "dx", "dy")
+
+    def __init__(self, bgr, alpha, dx, dy):
+        self.bgr = bgr
+        self.alpha = alpha
+        self.dx = dx
+        self.dy = dy
+
+
+class TextRenderer:
+    """
+    Малює український текст на BGR-кадрі без конвертації всього кадру в PIL.
+
+    Кожен унікальний (текст, розмір, колір, тінь) один раз растеризується через PIL у маленький
+    RGBA-патч, який тримається в LRU-кеші й потім просто змішується з потрібною ділянкою кадру на місці.
+    """
+
+    def __init__(self, font_path=None, max_sprites=256):
+        self.font_path = font_path or default_font_path()
+        self.max_sprites = max_sprites
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sprite(self, text, font_size, color, shadow_offset):
+        key = (text, font_size, tuple(color), shadow_offset)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                return sprite
+
+        sprite = self._rasterize(text, font_size, color, shadow_offset)
+        with self._lock:
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.max_sprites:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    def _rasterize(self, text, font_size, color, shadow_offset):
+        font = get_font(self.font_path, font_size)
+        left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+        width = max(1, right - left + shadow_offset)
+        height = max(1, bottom - top + shadow_offset)
+
+        text_mask = Image.new("L", (width, height), 0)
+        ImageDraw.Draw(text_mask).text((-left, -top), text, font=font, fill=255)
+        shadow_mask = Image.new("L", (width, height), 0)
+        if shadow_offset:
+            ImageDraw.Draw(shadow_mask).text((shadow_offset - left, shadow_offset - top), text, font=font, fill=255)
+
+        text_a = np.asarray(text_mask, dtype=np.float32)[..., None] / 255.0
+        shadow_a = np.asarray(shadow_mask, dtype=np.float32)[..., None] / 255.0
+
+        # Текст поверх чорної тіні: тінь додає лише непрозорість, колір дає текст
+        alpha = text_a + shadow_a * (1.0 - text_a)
+        bgr = text_a * np.asarray(color, dtype=np.float32).reshape(1, 1, 3)
+        return TextSprite(bgr, alpha, left, top)
+
+    def draw(self, frame, text, position, color=(0, 255, 0), font_size=24, shadow_offset=1):
+        """
+        Малює текст на кадрі на місці. color — у BGR, як в OpenCV
+        """
+        if not text:
+            return frame
+        sprite = self.sprite(text, font_size, color, shadow_offset)
+
+        h, w = frame.shape[:2]
+        x0, y0 = int(position[0]) + sprite.dx, int(position[1]) + sprite.dy
+        sh, sw = sprite.alpha.shape[:2]
+        fx0, fy0 = max(0, x0), max(0, y0)
+        fx1, fy1 = min(w, x0 + sw), min(h, y0 + sh)
+        if fx0 >= fx1 or fy0 >= fy1:
+            return frame
+
+        sx0, sy0 = fx0 - x0, fy0 - y0
+        sx1, sy1 = sx0 + (fx1 - fx0), sy0 + (fy1 - fy0)
+        alpha = sprite.alpha[sy0:sy1, sx0:sx1]
+        roi = frame[fy0:fy1, fx0:fx1]
+        roi[:] = (roi * (1.0 - alpha) + sprite.bgr[sy0:sy1, sx0:sx1]).astype(np.uint8)
+        return frame
+
+
+_default_renderer = TextRenderer()
+
+
+def draw_text(frame, text, position, color=(0, 255, 0), font_size=24, shadow_offset=1):
+    return _default_renderer.draw(frame, text, position, color, font_size, shadow_offset)
+
+
+# --- Буфер команд малювання та компонувальник ---
+
+# З'єднання landmarks руки MediaPipe (те саме, що mp.solutions.hands.HAND_CONNECTIONS)
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+
+class OverlayBuffer:
+    """
+    Список команд малювання для одного кадру.
+
+    Інференс і логіка лише додають сюди команди, а малює їх Compositor один раз за кадр.
+    Вимкнений буфер (headless-режим) ігнорує всі команди.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.commands = []
+
+    def rect(self, bbox, color, thickness=2):
+        if self.enabled:
+            self.commands.append(("rect", tuple(int(v) for v in bbox), color, thickness))
+
+    def text(self, text, position, color=(0, 255, 0), font_size=24, darwin_factor=1.5, shadow_offset=1):
+        """
+        Український текст через TextRenderer; font_size масштабується під ширину кадру під час рендеру.
+        shadow_offset=None — товщина тіні залежить від розміру шрифту
+        """
+        if self.enabled and text:
+            self.commands.append(("text", text, position, color, font_size, darwin_factor, shadow_offset))
+
+    def label(self, text, position, color=(255, 255, 0), scale=0.7, thickness=2):
+        """
+        Короткий латинський підпис через cv2.putText
+        """
+        if self.enabled and text:
+            self.commands.append(("label", text, tuple(int(v) for v in position), color, scale, thickness))
+
+    def landmarks(self, points, connections=HAND_CONNECTIONS, point_color=(0, 255, 0), line_color=(255, 0, 0)):
+        if self.enabled:
+            self.commands.append(("landmarks", points, connections, point_color, line_color))
+
+    def banner(self, text, color=(0, 255, 0), font_size=40, position=(20, 40)):
+        """
+        Повідомлення асистента у верхньому куті кадру
+        """
+        self.text(text, position, color, font_size, darwin_factor=1.2, shadow_offset=None)
+
+    def extend(self, other):
+        if self.enabled and other is not None:
+            self.commands.extend(other.commands)
+
+    def clear(self):
+        self.commands.clear()
+
+
+class Compositor:
+    """
+    Малює всі команди OverlayBuffer за один прохід.
+
+    За замовчуванням рендерить на копії кадру, тому кадр, який ще читають стадії інференсу,
+    не змінюється. enabled=False (headless) повертає кадр без змін і без копіювання.
+    """
+
+    def __init__(self, enabled=True, renderer=None):
+        self.enabled = enabled
+        self.renderer = renderer or _default_renderer
+
+    def render(self, frame, overlay, copy=True):
+        if not self.enabled:
+            return frame
+        canvas = frame.copy() if copy else frame
+        width = canvas.shape[1]
+
+        for command in overlay.commands:
+            kind = command[0]
+            if kind == "rect":
+                _, (x1, y1, x2, y2), color, thickness = command
+                cv2.rectangle(canvas, (x1, y1), (x2, y2), color, thickness)
+            elif kind == "text":
+                _, text, position, color, font_size, darwin_factor, shadow_offset = command
+                size = scale_font_size(width, font_size, darwin_factor)
+                if shadow_offset is None:
+                    shadow_offset = max(1, int(size / 20))
+                self.renderer.draw(canvas, text, position, color, size, shadow_offset)
+            elif kind == "label":
+                _, text, position, color, scale, thickness = command
+                cv2.putText(canvas, text, position, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+            elif kind == "landmarks":
+                _, points, connections, point_color, line_color = command
+                self._draw_landmarks(canvas, points, connections, point_color, line_color)
+        return canvas
+
+    @staticmethod
+    def _draw_landmarks(canvas, points, connections, point_color, line_color, radius=3, thickness=2):
+        pts = [(int(p[0]), int(p[1])) for p in points]
+        for a, b in connections:
+            cv2.line(canvas, pts[a], pts[b], line_color, thickness)
+        # Як у mediapipe.drawing_utils: біла облямівка, потім сама точка
+        for pt in pts:
+            cv2.circle(canvas, pt, radius + 1, (255, 255, 255), -1)
+            cv2.circle(canvas, pt, radius, point_color, thickness)
@@ -1,39 +1,261 @@
 import asyncio
+import hashlib
+import heapq
+import itertools
 import os
 import threading
 import time
-import edge_tts
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 
-def speak_task(text):
-    filename = f"voice_{int(time.time())}.mp3"
-    try:
-        VOICE = "uk-UA-PolinaNeural" 
-        
+VOICE = "uk-UA-PolinaNeural"
+CACHE_DIR = os.path.join("cache", "tts")
+
+# Менше число — раніше в черзі
+PRIORITY_HIGH = 0     # відповіді на голосові команди
+PRIORITY_NORMAL = 1   # реакції на жести
+PRIORITY_LOW = 2      # вітання
+
+
+class EdgeTTSSynthesizer:
+    """
+    Синтез через edge-tts (мережевий запит)
+    """
+    extension = ".mp3"
+
+    def __init__(self, voice=VOICE):
+        self.voice = voice
+
+    def synthesize(self, text, path):
+        import edge_tts
+
         async def generate():
-            communicate = edge_tts.Communicate(text, VOICE)
-            await communicate.save(filename)
+            await edge_tts.Communicate(text, self.voice).save(path)
 
         loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(generate())
-        loop.close()
-
-        if os.path.exists(filename):
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                time.sleep(0.1)
-            
-            pygame.mixer.music.unload()  # Звільняємо файл
-            time.sleep(0.2)             # Коротка пауза для ОС, щоб відпустити дескриптор
-            os.remove(filename)
-            print(f"🗑 Тимчасовий файл {filename} видалено")
-    except Exception as e:
-        print(f"🔊 Помилка звуку: {e}")
-        if os.path.exists(filename):
-            try: os.remove(filename)
-            except: pass
-
-def speak_async(text):
-    threading.Thread(target=speak_task, args=(text,), daemon=True).start()
\ No newline at end of file
+        try:
+            loop.run_until_complete(generate())
+        finally:
+            loop.close()
+
+
+class SilentSynthesizer:
+    """
+    Локальна заглушка для тестів і машин без мережі: коротка тиша у WAV
+    """
+    extension = ".wav"
+
+    def __init__(self, voice="silent", seconds=0.1, sample_rate=16000):
+        self.voice = voice
+        self.seconds = seconds
+        self.sample_rate = sample_rate
+        self.calls = 0
+
+    def synthesize(self, text, path):
+        self.calls += 1
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(b"\0\0" * int(self.seconds * self.sample_rate))
+
+
+class TTSCache:
+    """
+    Content-addressed кеш озвучки на диску: файл = sha1(голос, текст), тож одна фраза синтезується
+    один раз на все життя кешу. Декодовані pygame.mixer.Sound для гарячих фраз тримаються в пам'яті (LRU).
+    """
+
+    def __init__(self, synthesizer, cache_dir=CACHE_DIR, max_sounds=64):
+        self.synthesizer = synthesizer
+        self.cache_dir = cache_dir
+        self.max_sounds = max_sounds
+        self._sounds = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, text):
+        key = hashlib.sha1(f"{self.synthesizer.voice}\n{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + self.synthesizer.extension)
+
+    def get_path(self, text):
+        """
+        Шлях до аудіо фрази; синтезує, якщо його ще немає. Паралельні запити однієї фрази синтезують її один раз
+        """
+        path = self.path_for(text)
+        if os.path.exists(path):
+            return path
+        with self._lock:
+            key_lock = self._key_locks.setdefault(path, threading.Lock())
+        with key_lock:
+            if not os.path.exists(path):
+                # Пишемо в тимчасовий файл і атомарно перейменовуємо: недописаний файл ніколи не потрапить у кеш
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                try:
+                    self.synthesizer.synthesize(text, tmp)
+                    os.replace(tmp, path)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+        with self._lock:
+            self._key_locks.pop(path, None)
+        return path
+
+    def get_sound(self, text):
+        """
+        Декодований звук фрази (LRU у пам'яті) або None, якщо mixer недоступний
+        """
+        with self._lock:
+            sound = self._sounds.get(text)
+            if sound is not None:
+                self._sounds.move_to_end(text)
+                return sound
+        path = self.get_path(text)
+        try:
+            sound = pygame.mixer.Sound(path)
+        except pygame.error:
+            return None
+        with self._lock:
+            self._sounds[text] = sound
+            while len(self._sounds) > self.max_sounds:
+                self._sounds.popitem(last=False)
+        return sound
+
+
+class _Utterance:
+    def __init__(self, text, priority, seq, future):
+        self.text = text
+        self.priority = priority
+        self.seq = seq
+        self.future = future          # синтез стартує одразу при постановці в чергу
+        self.done = threading.Event()
+
+
+class VoiceEngine:
+    """
+    Один потік відтворення з пріоритетною чергою: фрази не б'ються за mixer і звучать по черзі.
+    Однакові фрази, що ще чекають у черзі, зливаються в одну (з вищим із пріоритетів).
+    Синтез іде в окремому пулі, тож наступна фраза готується, поки грає поточна.
+    Попередній синтез (prewarm) має власний однопотоковий пул: черга фраз при старті
+    не затримує синтез того, що треба сказати зараз.
+    """
+
+    def __init__(self, synthesizer=None, cache_dir=CACHE_DIR, synth_workers=2):
+        self.cache = TTSCache(synthesizer or EdgeTTSSynthesizer(), cache_dir)
+        self._synth_pool = ThreadPoolExecutor(max_workers=synth_workers, thread_name_prefix="tts")
+        self._prewarm_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-prewarm")
+        self._heap = []
+        self._pending = {}  # text -> _Utterance, що ще не почала звучати
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._thread = threading.Thread(target=self._run, name="voice", daemon=True)
+        self._thread.start()
+
+    def say(self, text, priority=PRIORITY_NORMAL):
+        """
+        Ставить фразу в чергу й одразу повертає _Utterance (done — подія завершення відтворення)
+        """
+        with self._cond:
+            utterance = self._pending.get(text)
+            if utterance is not None:
+                if priority < utterance.priority:
+                    # Старий запис у купі стане "застарілим" і буде пропущений
+                    utterance.priority = priority
+                    heapq.heappush(self._heap, (priority, utterance.seq, utterance))
+                return utterance
+
+            future = self._synth_pool.submit(self.cache.get_sound, text)
+            utterance = _Utterance(text, priority, next(self._seq), future)
+            self._pending[text] = utterance
+            heapq.heappush(self._heap, (priority, utterance.seq, utterance))
+            self._cond.notify()
+            return utterance
+
+    def prewarm(self, texts):
+        """
+        Синтезує й декодує фрази у фоні, нічого не відтворюючи
+        """
+        for text in dict.fromkeys(texts):
+            self._prewarm_pool.submit(self._prewarm_one, text)
+
+    def _prewarm_one(self, text):
+        try:
+            self.cache.get_sound(text)
+        except Exception as e:
+            print(f"🔊 Не вдалося підготувати '{text}': {e}")
+
+    def _next(self):
+        with self._cond:
+            while True:
+                while self._heap:
+                    priority, _, utterance = heapq.heappop(self._heap)
+                    if self._pending.get(utterance.text) is utterance and priority == utterance.priority:
+                        del self._pending[utterance.text]
+                        return utterance
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            utterance = self._next()
+            try:
+                if not pygame.mixer.get_init():
+                    continue  # без звукової карти фраза лише потрапляє в кеш
+                sound = utterance.future.result()
+                if sound is not None:
+                    channel = sound.play()
+                    while channel is not None and channel.get_busy():
+                        time.sleep(0.02)
+                else:
+                    self._play_file(self.cache.get_path(utterance.text))
+            except Exception as e:
+                print(f"🔊 Помилка звуку: {e}")
+            finally:
+                utterance.done.set()
+
+    def _play_file(self, path):
+        # Запасний шлях, якщо Sound не декодує формат: потокове відтворення через mixer.music
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.play()
+        while pygame.mixer.music.get_busy():
+            time.sleep(0.05)
+        pygame.mixer.music.unload()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_voice_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = VoiceEngine()
+        return _engine
+
+
+def set_synthesizer(synthesizer, cache_dir=CACHE_DIR):
+    """
+    Підміна синтезатора (наприклад, SilentSynthesizer у тестах); створює новий рушій
+    """
+    global _engine
+    with _engine_lock:
+        _engine = VoiceEngine(synthesizer, cache_dir)
+        return _engine
+
+
+def speak_task(text, priority=PRIORITY_HIGH, timeout=30):
+    """
+    Озвучує фразу й чекає завершення відтворення
+    """
+    get_voice_engine().say(text, priority).done.wait(timeout)
+
+
+def speak_async(text, priority=PRIORITY_NORMAL):
+    get_voice_engine().say(text, priority)
+
+
+def prewarm(texts):
+    get_voice_engine().prewarm(texts)